@@ -1,6 +1,15 @@
 import os
+import sys
+import mmap
+import array
+import bisect
 import logging
+import itertools
+import multiprocessing
+import multiprocessing.util
+import threading
 from collections import namedtuple
+from collections import OrderedDict
 
 from funcy.objects import cached_property
 import vstruct
@@ -25,6 +34,25 @@ CIM_TYPE_WIN7 = "win7"
 DATA_PAGE_SIZE = 0x2000
 INDEX_PAGE_SIZE = 0x2000
 
+# the default memory budget for parsed data pages, in bytes.
+DEFAULT_DATA_PAGE_CACHE_SIZE = 0x1000000
+# the default number of parsed index pages to cache, excluding pinned pages.
+DEFAULT_INDEX_PAGE_CACHE_SIZE = 0x400
+# the default number of levels of the index, from the root, that are never evicted.
+DEFAULT_PINNED_INDEX_LEVELS = 0x2
+# the number of subtrees to hand to each worker process when walking the index in parallel.
+# more, smaller tasks balance better across workers.
+PARALLEL_SUBTREES_PER_PROCESS = 0x4
+# the number of pages read at once, when reading ahead.
+DEFAULT_READAHEAD_PAGES = 0x40
+# the number of consecutive sequential page reads after which to start reading ahead.
+READAHEAD_TRIGGER = 0x4
+# the default number of parsed class definitions and layouts shared by the object resolvers of a repository.
+DEFAULT_CLASS_CACHE_SIZE = 0x1000
+# the default number of distinct index key parts to intern.
+# pages decoded once the limit is reached keep their own strings instead.
+DEFAULT_MAX_INTERNED_KEY_PARTS = 0x40000
+
 INDEX_PAGE_INVALID = 0xFFFFFFFF
 INDEX_PAGE_INVALID2 = 0x00000000
 
@@ -145,32 +173,264 @@ MAPPING_TYPES = {
 }
 
 
+UINT16_ARRAY_TYPECODE = "H"
+UINT32_ARRAY_TYPECODE = "I" if array.array("I").itemsize == 4 else "L"
+
+
+def uint16_array(buf):
+    """
+    decode a buffer of little endian uint16s in one pass.
+
+    Args:
+        buf (bytes): the raw bytes, a multiple of two bytes long.
+
+    Returns:
+        array.array: the decoded values.
+    """
+    return _uint_array(UINT16_ARRAY_TYPECODE, buf)
+
+
+def uint32_array(buf):
+    """
+    decode a buffer of little endian uint32s in one pass.
+
+    Args:
+        buf (bytes): the raw bytes, a multiple of four bytes long.
+
+    Returns:
+        array.array: the decoded values.
+    """
+    return _uint_array(UINT32_ARRAY_TYPECODE, buf)
+
+
+def _uint_array(typecode, buf):
+    ret = array.array(typecode)
+    if hasattr(ret, "frombytes"):
+        # accepts any buffer, such as a `memoryview`, without an intermediate copy.
+        ret.frombytes(buf)
+    else:
+        ret.fromstring(bytes(buf))
+    if sys.byteorder != "little":
+        ret.byteswap()
+    return ret
+
+
+MAPPING_ENTRY_SIZES = {
+    CIM_TYPE_XP: 0x4,
+    CIM_TYPE_WIN7: 0x18,
+}
+
+
+MAPPING_ENTRY_TYPES = {
+    CIM_TYPE_XP: EntryXP,
+    CIM_TYPE_WIN7: EntryWin7,
+}
+
+
+# translation table that masks the high byte of a page number with `MAPPING_PAGE_ID_MASK`.
+_PAGE_ID_HIGH_BYTE_TABLE = bytes(bytearray(b & (MAPPING_PAGE_ID_MASK >> 24) for b in range(0x100)))
+
+
+class MappingTable(object):
+    """
+    a compact form of a MappingWin7/MappingXP structure.
+
+    the entry array is decoded in a single pass into a typed array of page numbers,
+      rather than one vstruct per entry.
+    the raw bytes are retained so that individual entries, or the complete
+      vstruct, can be parsed on demand.
+    """
+
+    def __init__(self, cim_type, buf, offset=0):
+        """
+        Args:
+            cim_type (str): the repository type.
+            buf (bytes): the contents of the mapping file.
+            offset (int): the offset of this mapping within the buffer.
+        """
+        super(MappingTable, self).__init__()
+        self.cim_type = cim_type
+
+        self.header = MAPPING_HEADER_TYPES[cim_type]()
+        self.header.vsParse(buf, offset=offset)
+
+        entry_count = self.header.mapping_entry_count
+        entry_size = MAPPING_ENTRY_SIZES[cim_type]
+        self._entries_offset = len(self.header)
+        entries_offset = offset + self._entries_offset
+        entries_end = entries_offset + entry_count * entry_size
+
+        # the page number is the first field of each entry.
+        # mask the flags from the high byte of each page number in a single pass,
+        #  since the entries are little endian.
+        entries = bytearray(buf[entries_offset:entries_end])
+        entries[3::entry_size] = entries[3::entry_size].translate(_PAGE_ID_HIGH_BYTE_TABLE)
+        self.page_numbers = uint32_array(entries)[::entry_size // 4]
+
+        self.free_dword_count, = struct.unpack_from("<I", buf, entries_end)
+        footer_offset = entries_end + 0x4 + self.free_dword_count * 0x4
+        self.footer_signature, = struct.unpack_from("<I", buf, footer_offset)
+
+        self.buf = bytes(buf[offset:footer_offset + 0x4])
+
+    def __len__(self):
+        return len(self.buf)
+
+    @property
+    def mapping_entry_count(self):
+        return self.header.mapping_entry_count
+
+    @property
+    def physical_page_count(self):
+        return self.header.physical_page_count
+
+    def get_entry(self, index):
+        """
+        parse the raw structure of a single entry.
+
+        Args:
+            index (int): the entry index, which is the logical page number.
+
+        Returns:
+            EntryWin7 | EntryXP: the parsed entry.
+        """
+        if not 0 <= index < self.mapping_entry_count:
+            raise IndexError(index)
+
+        entry = MAPPING_ENTRY_TYPES[self.cim_type]()
+        entry.vsParse(self.buf, offset=self._entries_offset + index * MAPPING_ENTRY_SIZES[self.cim_type])
+        return entry
+
+    def get_map(self):
+        """
+        parse the complete vstruct representation of the mapping.
+        this is slow, and should only be used for inspecting the raw structure.
+
+        Returns:
+            MappingWin7 | MappingXP: the parsed mapping.
+        """
+        m = MAPPING_TYPES[self.cim_type]()
+        m.vsParse(self.buf)
+        return m
+
+    @classmethod
+    def from_map(cls, map):
+        """
+        decode the table from an already parsed mapping structure.
+
+        Args:
+            map (MappingWin7 | MappingXP): the raw map structure.
+
+        Returns:
+            MappingTable: the decoded map structure.
+        """
+        for cim_type, map_type in MAPPING_TYPES.items():
+            if isinstance(map, map_type):
+                return cls(cim_type, map.vsEmit())
+        raise ValueError("unexpected mapping type: " + map.__class__.__name__)
+
+
 class Mapping(object):
     """
     helper routines around fetching page mappings.
     """
 
-    def __init__(self, map):
+    def __init__(self, map=None, table=None):
         """
+        provide either the raw map structure, or the decoded table.
+        the raw structure is parsed from the table on demand.
+
         Args:
-            map (MappingWin7 | MappingXp): the raw map structure.
+            map (MappingWin7 | MappingXP): the raw map structure.
+            table (MappingTable): the decoded map structure.
         """
-        self.map = map
-        # cache of map from physical page to logical page
-        self._reverse_mapping = {}
+        if table is None:
+            if map is None:
+                raise ValueError("either map or table is required")
+            table = MappingTable.from_map(map)
+            self.map = map
+        self._table = table
 
-    def _build_reverse_mapping(self):
-        self._reverse_mapping = {}
-        for i in range(self.map.header.mapping_entry_count):
-            pnum = self.map.entries[i].page_number
-            # unknown precisely what this means
-            if pnum == UNMAPPED_PAGE_VALUE:
-                continue
+    @cached_property
+    def map(self):
+        """
+        the raw map structure, parsed on first access.
+
+        Returns:
+            MappingWin7 | MappingXP: the raw map structure.
+        """
+        return self._table.get_map()
+
+    @property
+    def header(self):
+        """
+        Returns:
+            MappingHeaderWin7 | MappingHeaderXP: the raw map header.
+        """
+        return self._table.header
+
+    @property
+    def mapping_entry_count(self):
+        return int(self._table.mapping_entry_count)
+
+    @property
+    def physical_page_count(self):
+        return int(self._table.physical_page_count)
+
+    def get_entry(self, logical_page_number):
+        """
+        parse the raw mapping entry for the given logical page.
+
+        Args:
+            logical_page_number (int): the logical page number
+
+        Returns:
+            EntryWin7 | EntryXP: the parsed entry.
+        """
+        return self._table.get_entry(logical_page_number)
 
-            if pnum in self._reverse_mapping:
-                logger.warning('logical page %d already mapped!', i)
+    @cached_property
+    def _reverse_mapping(self):
+        """
+        dense map from physical page number to logical page number,
+          with `MAPPING_PAGE_UNAVAIL` for physical pages that are not mapped.
+
+        Returns:
+            array.array: the logical page number of each physical page.
+        """
+        page_numbers = self._table.page_numbers
+
+        # the dict and arrays are built by the interpreter in bulk, rather than entry by entry.
+        # like assigning the entries in order, the last logical page wins when two map to the same physical page.
+        logical_page_numbers = dict(zip(page_numbers, range(len(page_numbers))))
+        # unknown precisely what this means
+        logical_page_numbers.pop(UNMAPPED_PAGE_VALUE, None)
+
+        mapped_count = len(page_numbers) - page_numbers.count(UNMAPPED_PAGE_VALUE)
+        if len(logical_page_numbers) != mapped_count:
+            seen = set()
+            for i, pnum in enumerate(page_numbers):
+                if pnum == UNMAPPED_PAGE_VALUE:
+                    continue
+                if pnum in seen:
+                    logger.warning('logical page %d already mapped!', i)
+                seen.add(pnum)
+
+        size = max(self.physical_page_count, max(logical_page_numbers) + 1 if logical_page_numbers else 0)
+        return array.array(UINT32_ARRAY_TYPECODE,
+                           map(logical_page_numbers.get, range(size), [MAPPING_PAGE_UNAVAIL] * size))
+
+    def _get_entry_page_number(self, logical_page_number):
+        if logical_page_number > self.mapping_entry_count:
+            raise IndexError(logical_page_number)
+
+        if logical_page_number < 0:
+            raise UnmappedPage(logical_page_number)
 
-            self._reverse_mapping[pnum] = i
+        try:
+            return self._table.page_numbers[logical_page_number]
+        except IndexError:
+            raise UnmappedPage(logical_page_number)
 
     def is_logical_page_mapped(self, logical_page_number):
         """
@@ -185,15 +445,7 @@ class Mapping(object):
         Raises:
             IndexError: if the page number is too big
         """
-        if logical_page_number > int(self.map.header.mapping_entry_count):
-            raise IndexError(logical_page_number)
-
-        try:
-            entry = self.map.entries[logical_page_number]
-        except Exception:
-            raise UnmappedPage(logical_page_number)
-
-        return entry.page_number != UNMAPPED_PAGE_VALUE
+        return self._get_entry_page_number(logical_page_number) != UNMAPPED_PAGE_VALUE
 
     def get_physical_page_number(self, logical_page_number):
         """
@@ -209,14 +461,7 @@ class Mapping(object):
             UnmappedPage: if the page is unallocated.
             IndexError: if the page number is too big
         """
-        if logical_page_number > int(self.map.header.mapping_entry_count):
-            raise IndexError(logical_page_number)
-
-        try:
-            entry = self.map.entries[logical_page_number]
-        except Exception:
-            raise UnmappedPage(logical_page_number)
-        pnum = entry.page_number
+        pnum = self._get_entry_page_number(logical_page_number)
         if pnum == UNMAPPED_PAGE_VALUE:
             raise UnmappedPage(logical_page_number)
         return pnum
@@ -234,13 +479,10 @@ class Mapping(object):
         Raises:
             UnmappedPage: if the page is unmapped.
         """
-        if not self._reverse_mapping:
-            self._build_reverse_mapping()
+        if not self.is_physical_page_mapped(physical_page_number):
+            raise UnmappedPage(physical_page_number)
 
-        if physical_page_number in self._reverse_mapping:
-            return self._reverse_mapping[physical_page_number]
-
-        raise UnmappedPage(physical_page_number)
+        return self._reverse_mapping[physical_page_number]
 
     def is_physical_page_mapped(self, physical_page_number):
         """
@@ -252,10 +494,46 @@ class Mapping(object):
         Returns:
             bool: if the physical page is mapped.
         """
-        if not self._reverse_mapping:
-            self._build_reverse_mapping()
+        if not 0 <= physical_page_number < len(self._reverse_mapping):
+            return False
+
+        return self._reverse_mapping[physical_page_number] != MAPPING_PAGE_UNAVAIL
+
+    def get_mapped_logical_pages(self):
+        """
+        get the logical page numbers that are mapped to a physical page.
+
+        Returns:
+            array.array: the ascending logical page numbers.
+        """
+        page_numbers = self._table.page_numbers
+        is_mapped = (pnum != UNMAPPED_PAGE_VALUE for pnum in page_numbers)
+        return array.array(UINT32_ARRAY_TYPECODE,
+                           itertools.compress(range(len(page_numbers)), is_mapped))
+
+    def get_unmapped_physical_pages(self, page_count=None):
+        """
+        get the physical page numbers that are not mapped to a logical page.
+        these pages contain unallocated data.
 
-        return physical_page_number in self._reverse_mapping
+        Args:
+            page_count (int): the number of physical pages to consider.
+              defaults to the physical page count from the mapping header.
+              prefer the page count of the underlying file, which may differ.
+
+        Returns:
+            array.array: the ascending physical page numbers.
+        """
+        if page_count is None:
+            page_count = self.physical_page_count
+
+        # one byte per physical page, set while the page is unmapped.
+        is_unmapped = bytearray(b"\x01") * page_count
+        for pnum in self._table.page_numbers:
+            if pnum < page_count:
+                is_unmapped[pnum] = 0
+        return array.array(UINT32_ARRAY_TYPECODE,
+                           itertools.compress(range(page_count), is_unmapped))
 
 
 class TOCEntry(vstruct.VStruct):
@@ -305,11 +583,10 @@ class TOC(vstruct.VArray):
     def _parse_entries(self, bytez, offset):
         entries = []
 
-        endoffset = bytez.find(b"\x00" * 0x10, offset)
-        if endoffset == -1:
-            raise ParseError('no empty entry')
-
-        while offset < endoffset + 0x10:
+        # scan whole entries until the empty entry, or an invalid one.
+        # this doesn't search for the empty entry up front,
+        #  so the buffer may be a `memoryview`, which doesn't support `.find()`.
+        while offset + 0x10 <= len(bytez):
             t = TOCEntry()
             offset = t.vsParse(bytez, offset=offset)
 
@@ -345,6 +622,53 @@ class TOC(vstruct.VArray):
         return 0x10 * (len(entries) + 1)
 
 
+TOC_ENTRY = struct.Struct("<IIII")
+
+TOCEntryInfo = namedtuple("TOCEntryInfo", ["record_id", "offset", "size", "CRC"])
+
+
+def _iter_toc_entries(buf, offset, end):
+    if hasattr(TOC_ENTRY, "iter_unpack"):
+        return TOC_ENTRY.iter_unpack(buf[offset:end])
+    return (TOC_ENTRY.unpack_from(buf, o) for o in range(offset, end, TOC_ENTRY.size))
+
+
+def parse_toc(buf, offset=0):
+    """
+    decode the TOC at the start of a data page into a compact array.
+    this follows the same rules as `TOC.vsParse`, without creating a vstruct per entry.
+
+    Args:
+        buf (Union[bytes, memoryview]): the raw page contents.
+        offset (int): the offset of the TOC.
+
+    Returns:
+        array.array: the (record_id, offset, size, CRC) fields of the entries, flattened.
+          empty when the TOC cannot be parsed.
+    """
+    # we have to guess where the end of the TOC is.
+    # so, parse whole entries up to and including the first empty entry.
+    # this doesn't search for the empty entry up front,
+    #  so the buffer may be a `memoryview`, which doesn't support `.find()`.
+    end = len(buf)
+    end -= (end - offset) % TOC_ENTRY.size
+
+    count = 0
+    for record_id, entry_offset, size, crc in _iter_toc_entries(buf, offset, end):
+        if record_id == 0 and entry_offset == 0 and size == 0 and crc == 0:
+            # there should be a final empty entry to mark the end of the toc.
+            # don't include it in the TOC.
+            return uint32_array(buf[offset:offset + count * TOC_ENTRY.size])
+
+        if entry_offset >= DATA_PAGE_SIZE or entry_offset == 0 or size == 0 or record_id == 0:
+            break
+
+        count += 1
+
+    # failed to parse TOC correctly
+    return uint32_array(b"")
+
+
 class IndexKeyNotFoundError(Exception):
     pass
 
@@ -361,11 +685,68 @@ class DataPage(object):
         self.buf = buf
         self.logical_page_number = logical_page_number
         self.physical_page_number = physical_page_number
-        self.toc = TOC()
-        self.toc.vsParse(buf)
+
+        # the TOC fields, four per entry.
+        # prefer this to `.toc`, which creates a vstruct for each entry.
+        self._toc_entries = parse_toc(buf)
+        # if this is zero, then the TOC has not be parsed correctly.
+        self.toc_count = len(self._toc_entries) // 4
+
+        # map from record id to TOC index.
+        # when record ids are repeated, the first entry wins.
+        self._toc_index = {}
+        for i in range(self.toc_count - 1, -1, -1):
+            self._toc_index[self._toc_entries[4 * i]] = i
+
+    @cached_property
+    def toc(self):
+        """
+        the TOC parsed into vstructs, for callers that need the raw structures.
+
+        Returns:
+            TOC: the parsed TOC.
+        """
+        toc = TOC()
+        toc.vsParse(self.buf)
+        return toc
+
+    @property
+    def toc_length(self):
+        """
+        the size of the TOC entries, excluding the terminating empty entry.
+
+        Returns:
+            int: the size, in bytes.
+        """
+        return self.toc_count * TOC_ENTRY.size
+
+    def get_toc_entry(self, toc_index):
+        """
+        Args:
+            toc_index (int): the index of the TOC entry.
+
+        Returns:
+            TOCEntryInfo: the fields of the TOC entry.
+        """
+        if not 0 <= toc_index < self.toc_count:
+            raise IndexError(toc_index)
+        i = 4 * toc_index
+        return TOCEntryInfo(*self._toc_entries[i:i + 4])
+
+    # approximate memory used by each parsed TOC entry.
+    TOC_ENTRY_SIZE_ESTIMATE = 0x80
+
+    def estimate_size(self):
+        """
+        approximate the memory used by the parsed page.
+
+        Returns:
+            int: the size, in bytes.
+        """
+        return len(self.buf) + self.toc_count * self.TOC_ENTRY_SIZE_ESTIMATE
 
     def _get_object_buffer_by_index(self, toc_index):
-        toc_entry = self.toc[toc_index]
+        toc_entry = self.get_toc_entry(toc_index)
         return self.buf[toc_entry.offset:toc_entry.offset + toc_entry.size]
 
     def get_data_by_key(self, key):
@@ -380,18 +761,18 @@ class DataPage(object):
         Returns:
             bytes: the raw bytes for the requested object.
         """
-        target_id = key.data_id
+        toc_index = self._toc_index.get(key.data_id)
+        if toc_index is None:
+            raise IndexKeyNotFoundError(key)
+
+        toc = self.get_toc_entry(toc_index)
         target_size = key.data_length
-        for i in range(self.toc.count):
-            toc = self.toc[i]
-            if toc.record_id == target_id:
-                if toc.size < target_size:
-                    raise RuntimeError("Data size doesn't match TOC size")
-                if toc.size > DATA_PAGE_SIZE - toc.offset:
-                    logger.debug("Large data item: key: %s, size: %s",
-                                 str(key), hex(target_size))
-                return self.buf[toc.offset:toc.offset + toc.size]
-        raise IndexKeyNotFoundError(key)
+        if toc.size < target_size:
+            raise RuntimeError("Data size doesn't match TOC size")
+        if toc.size > DATA_PAGE_SIZE - toc.offset:
+            logger.debug("Large data item: key: %s, size: %s",
+                         str(key), hex(target_size))
+        return self.buf[toc.offset:toc.offset + toc.size]
 
     def __getitem__(self, key):
         """
@@ -415,8 +796,8 @@ class DataPage(object):
         """
         ObjectItem = namedtuple("ObjectItem", ["offset", "buffer"])
         ret = []
-        for i in range(self.toc.count):
-            toc = self.toc[i]
+        for i in range(self.toc_count):
+            toc = self.get_toc_entry(i)
             buf = self.buf[toc.offset:toc.offset + toc.size]
             ret.append(ObjectItem(toc.offset, buf))
         return ret
@@ -539,7 +920,8 @@ class IndexPage(vstruct.VStruct):
 
     def _get_string_part(self, string_index):
         string_offset = self.string_table[string_index]
-        return self.data[string_offset:bytes(self.data).find(b"\x00", string_offset)].decode("utf-8")
+        # the page may be backed by a memoryview, which has no `.decode()`.
+        return bytes(self.data[string_offset:bytes(self.data).find(b"\x00", string_offset)]).decode("utf-8")
 
     def _get_string(self, string_def_index):
         string_part_count = self.string_definition_table[string_def_index]
@@ -570,118 +952,1062 @@ class IndexPage(vstruct.VStruct):
         return int(self.children[child_index])
 
 
-class MissingDataFileError(Exception):
-    pass
+INDEX_PAGE_HEADER = struct.Struct("<IIIII")
 
 
-class LogicalDataStore(object):
+class StringInterner(object):
     """
-    provides an interface for accessing data by logical page or object id.
-    
-    Args:
-        cim (CIM): the repo
-        mapping (Mapping): the data mapping.
+    assigns compact integer ids to strings, so that repeated strings are held only once.
+    ids are never reassigned, so once `max_size` strings are interned, new strings are refused.
     """
 
-    def __init__(self, cim, file_path, mapping):
-        super(LogicalDataStore, self).__init__()
-        self._cim = cim
-        self._file_path = file_path
-        self._mapping = mapping
-        self._file_size = os.path.getsize(file_path)
-        self.page_count = self._file_size // INDEX_PAGE_SIZE
-
-    def get_physical_page_buffer(self, physical_page_number):
+    def __init__(self, max_size=DEFAULT_MAX_INTERNED_KEY_PARTS):
         """
-        fetch the bytes of the page at the give physical index.
-        
         Args:
-            physical_page_number: the physical page number to fetch
-
-        Returns:
-            bytes: the raw page contents.
+            max_size (int): the maximum number of strings to intern.
         """
-        if not os.path.exists(self._file_path):
-            raise MissingDataFileError()
+        super(StringInterner, self).__init__()
+        self.max_size = max_size
+        # map from string to id
+        self._ids = {}
+        # map from id to string
+        self._strings = []
+        self._lock = threading.Lock()
 
-        if physical_page_number >= self.page_count:
-            raise IndexError(physical_page_number)
+    def __len__(self):
+        return len(self._strings)
 
-        with open(self._file_path, "rb") as f:
-            f.seek(DATA_PAGE_SIZE * physical_page_number)
-            return f.read(DATA_PAGE_SIZE)
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
 
-    def get_logical_page_buffer(self, logical_page_number):
+    def get_id(self, string):
         """
-        fetch the bytes of the page at the give logical index.
-        
+        fetch the id of the given string, without interning it.
+
         Args:
-            logical_page_number: the logical page number to fetch
+            string (str): the string to find.
 
         Returns:
-            bytes: the raw page contents.
+            int: the id of the string, or None if it has not been interned.
         """
-        if not self._mapping.is_logical_page_mapped(logical_page_number):
-            raise UnmappedPage(logical_page_number)
-        pnum = self._mapping.get_physical_page_number(logical_page_number)
-        return self.get_physical_page_buffer(pnum)
+        return self._ids.get(string)
 
-    def get_page(self, logical_page_number):
+    def intern(self, string):
         """
-        fetch the parsed page at the give logical index.
-        
+        fetch the id of the given string, assigning one if needed.
+
         Args:
-            logical_page_number: the logical page number to fetch
+            string (str): the string to intern.
 
         Returns:
-            DataPage: the parsed page.
+            int: the id of the string, or None if the string is new and the interner is full.
         """
-        pbuf = self.get_logical_page_buffer(logical_page_number)
-        pnum = self._mapping.get_physical_page_number(logical_page_number)
-        return DataPage(pbuf, logical_page_number, pnum)
+        string_id = self._ids.get(string)
+        if string_id is None:
+            with self._lock:
+                string_id = self._ids.get(string)
+                if string_id is None:
+                    if len(self._strings) >= self.max_size:
+                        return None
+                    string_id = len(self._strings)
+                    self._strings.append(string)
+                    self._ids[string] = string_id
+        return string_id
 
-    def get_object_buffer(self, key):
-        if not key.is_data_reference:
-            raise RuntimeError("Key is not data reference: %s", str(key))
 
-        # this logic of this function is a bit more complex than
-        #   we'd want, since we have to handle the case where an
-        #   item's data spans multiple pages.
-        page = self.get_page(key.data_page)
+# the number of bytes to scan at a time for the end of a NULL terminated string in a `memoryview`.
+ZSTR_SCAN_SIZE = 0x80
 
-        target_length = key.data_length
-        first_data = page.get_data_by_key(key)
 
-        # this is the common case, return early
-        if target_length == len(first_data):
-            return first_data
+def _read_zstr(buf, offset):
+    """
+    read the bytes of the NULL terminated string at the given offset, without its terminator.
+    when the buffer is a `memoryview`, which doesn't support `.find()`,
+      only the string itself is copied, not the rest of the buffer.
+    a string without a terminator runs to just before the end of the buffer.
 
-        # here we handle data that spans multiple pages
-        data = [first_data]
-        found_length = len(first_data)
+    Args:
+        buf (Union[bytes, memoryview]): the buffer.
+        offset (int): the offset of the string.
 
-        i = 1
-        while found_length < target_length:
-            next_page_buffer = self.get_logical_page_buffer(key.data_page + i)
-            if found_length + len(next_page_buffer) > target_length:
-                # this is the last page containing data for this item
-                chunk_size = target_length - found_length
-                data.append(next_page_buffer[:chunk_size])
-                found_length += chunk_size
-            else:
-                # the entire page is used for this item
-                data.append(next_page_buffer)
-                found_length += len(next_page_buffer)
-            i += 1
+    Returns:
+        bytes: the string.
+    """
+    if not isinstance(buf, memoryview):
+        end = buf.find(b"\x00", offset)
+        if end == -1:
+            end = len(buf) - 1
+        return buf[offset:end]
+
+    end = offset
+    while end < len(buf):
+        chunk = buf[end:end + ZSTR_SCAN_SIZE].tobytes()
+        i = chunk.find(b"\x00")
+        if i != -1:
+            return buf[offset:end + i].tobytes()
+        end += len(chunk)
+    return buf[offset:len(buf) - 1].tobytes()
+
+
+class FastIndexPage(object):
+    """
+    an index page decoded in bulk, rather than via vstruct callbacks.
+    provides the same `key_count`/`get_key`/`get_child` interface as `IndexPage`.
+
+    the tables are decoded into typed arrays,
+      and each string part is decoded at most once.
+
+    when given a `StringInterner`, all the string parts are decoded up front and interned,
+      and each key is held as a tuple of part ids rather than a string.
+    since many keys share the same `NS_`/`CD_` parts, this saves memory when
+      many pages are held at once.
+    the keys of these pages are searched by their part ids, see `Index.iter_prefix`,
+      and `get_key` builds a new `Key` on each call, rather than holding the strings.
+    """
 
-        return b"".join(data)
+    def __init__(self, buf, logical_page_number, physical_page_number, interner=None):
+        """
+        Args:
+            buf (Union[bytes, memoryview]): the raw bytes of the page.
+            logical_page_number (int):  the logical page number.
+            physical_page_number (int):  the physical page number.
+            interner (StringInterner): the interner with which to eagerly decode keys.
+              when the interner is full, the keys are decoded on demand, as without one.
 
+        Raises:
+            ParseError: if the tables don't fit in the page.
+        """
+        super(FastIndexPage, self).__init__()
+        self.logical_page_number = logical_page_number
+        self.physical_page_number = physical_page_number
 
-class InvalidMappingEntryIndex(Exception):
-    pass
+        # the header is parsed on demand, so hold a copy rather than a view of the page.
+        self._header_buf = bytes(buf[:INDEX_PAGE_HEADER.size])
+
+        sig, _, _, _, record_count = INDEX_PAGE_HEADER.unpack_from(buf, 0)
+        self._sig = sig
+        self.key_count = record_count
+
+        offset = INDEX_PAGE_HEADER.size
+        # skip unk0
+        offset += 4 * record_count
+
+        self._children = uint32_array(buf[offset:offset + 4 * (record_count + 1)])
+        offset += 4 * (record_count + 1)
+
+        self._keys = uint16_array(buf[offset:offset + 2 * record_count])
+        offset += 2 * record_count
+
+        string_definition_table_length, = struct.unpack_from("<H", buf, offset)
+        offset += 2
+        self._string_definition_table = uint16_array(buf[offset:offset + 2 * string_definition_table_length])
+        offset += 2 * string_definition_table_length
+
+        string_table_length, = struct.unpack_from("<H", buf, offset)
+        offset += 2
+        self._string_table = uint16_array(buf[offset:offset + 2 * (string_table_length + 1)])
+        offset += 2 * (string_table_length + 1)
+
+        if offset > len(buf):
+            raise ParseError("index page tables overrun page")
+
+        self._data = buf[offset:INDEX_PAGE_SIZE]
+
+        # cache of decoded string parts, by string table index
+        self._string_parts = [None] * len(self._string_table)
+        # cache of Key instances, by key index
+        self._key_cache = {}
+
+        # the interned part ids of each key, by key index
+        self._key_ids = None
+        if interner is not None:
+            self._key_ids = self._intern_keys(interner)
+
+        # the interner that resolves the part ids, or None when the keys are not interned.
+        self.key_parts = None
+        if self._key_ids is not None:
+            self.key_parts = interner
+            # everything needed to reconstruct the keys is now held by the interner.
+            self._keys = None
+            self._string_definition_table = None
+            self._string_table = None
+            self._string_parts = None
+            self._data = None
+            self._key_cache = None
+
+    def _intern_keys(self, interner):
+        # map from string table index to interned id
+        part_ids = {}
+        key_ids = []
+        for key_index in range(self.key_count):
+            string_def_index = self._keys[key_index]
+            string_part_count = self._string_definition_table[string_def_index]
+
+            ids = []
+            for i in range(string_part_count):
+                string_part_index = self._string_definition_table[string_def_index + 1 + i]
+                part_id = part_ids.get(string_part_index)
+                if part_id is None:
+                    part_id = interner.intern(self._get_string_part(string_part_index))
+                    if part_id is None:
+                        # the interner is full.
+                        return None
+                    part_ids[string_part_index] = part_id
+                ids.append(part_id)
+            key_ids.append(tuple(ids))
+        return key_ids
 
+    @cached_property
+    def header(self):
+        """
+        Returns:
+            IndexPageHeader: the raw page header.
+        """
+        header = IndexPageHeader()
+        header.vsParse(self._header_buf)
+        return header
 
-class InvalidPhysicalPageNumber(Exception):
+    @property
+    def is_valid(self):
+        return self._sig == INDEX_PAGE_TYPES.PAGE_TYPE_ACTIVE
+
+    def _get_string_part(self, string_index):
+        part = self._string_parts[string_index]
+        if part is None:
+            string_offset = self._string_table[string_index]
+            part = _read_zstr(self._data, string_offset).decode("utf-8")
+            self._string_parts[string_index] = part
+        return part
+
+    def _get_string(self, string_def_index):
+        string_part_count = self._string_definition_table[string_def_index]
+        part_indices = self._string_definition_table[string_def_index + 1:string_def_index + 1 + string_part_count]
+        return "/".join([self._get_string_part(i) for i in part_indices])
+
+    def get_key_ids(self, key_index):
+        """
+        fetch the interned ids of the parts of the given key.
+        keys with equal ids are equal.
+
+        Args:
+            key_index (int): the index of the key.
+
+        Returns:
+            Tuple[int]: the ids of the key parts, resolved via the `StringInterner`.
+
+        Raises:
+            RuntimeError: if the page keys were not interned.
+        """
+        if self._key_ids is None:
+            raise RuntimeError("index page keys are not interned")
+        return self._key_ids[key_index]
+
+    def get_key(self, key_index):
+        if self._key_ids is not None:
+            key_parts = self.key_parts
+            return Key("/".join([key_parts[i] for i in self._key_ids[key_index]]))
+
+        key = self._key_cache.get(key_index)
+        if key is None:
+            key = Key(self._get_string(self._keys[key_index]))
+            self._key_cache[key_index] = key
+        return key
+
+    def get_child(self, child_index):
+        """ get the logical page number of the given child index """
+        return self._children[child_index]
+
+
+class MissingDataFileError(Exception):
+    pass
+
+
+class RepositoryClosedError(Exception):
+    """
+    the repository files were closed, such as by `CIM.close()`,
+      while an object (like an `Index` or `ObjectResolver`) still reads through them.
+    fetch the stores from the repository again to reopen the files.
+    """
+    pass
+
+
+# python 2 memory mappings don't support `memoryview`.
+MMAP_SUPPORTS_MEMORYVIEW = sys.version_info[0] >= 3
+
+
+class MappedPageFile(object):
+    """
+    a read-only memory mapping of a file made up of fixed size pages.
+    pages are returned as zero-copy `memoryview` slices of the mapping.
+    on python 2, which can't view a mapping, pages are copied out of the mapping as `bytes`.
+
+    the mapping is held until `close()` is called.
+    page buffers must not be used after the file has been closed.
+    """
+
+    def __init__(self, file_path, page_size):
+        """
+        Args:
+            file_path (str): the path to the file to map.
+            page_size (int): the size of a page in the file.
+        """
+        super(MappedPageFile, self).__init__()
+        self._file_path = file_path
+        self._page_size = page_size
+
+        self._f = open(file_path, "rb")
+        if os.fstat(self._f.fileno()).st_size == 0:
+            # empty files cannot be mapped.
+            self._map = None
+            self._view = memoryview(b"")
+        else:
+            self._map = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            if MMAP_SUPPORTS_MEMORYVIEW:
+                self._view = memoryview(self._map)
+            else:
+                # slices of the mapping itself are copies.
+                self._view = self._map
+
+    @property
+    def is_closed(self):
+        return self._f is None
+
+    def get_page(self, page_number):
+        """
+        fetch a view of the page at the given index.
+
+        Args:
+            page_number (int): the page number to fetch.
+
+        Returns:
+            Union[memoryview, bytes]: the raw page contents.
+
+        Raises:
+            RepositoryClosedError: if the file has been closed.
+        """
+        if self.is_closed:
+            raise RepositoryClosedError("repository closed: " + self._file_path)
+        offset = self._page_size * page_number
+        return self._view[offset:offset + self._page_size]
+
+    def close(self):
+        if self.is_closed:
+            return
+
+        if MMAP_SUPPORTS_MEMORYVIEW:
+            self._view.release()
+        self._view = None
+
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # there are still page views outstanding.
+                # the mapping is released once they're garbage collected.
+                logger.debug("deferring unmap of %s: pages still referenced", self._file_path)
+            self._map = None
+
+        self._f.close()
+        self._f = None
+
+
+class FileHandlePool(object):
+    """
+    a set of files held open for the lifetime of a repository.
+
+    reads are positional (`os.pread`) and don't move a shared file offset,
+      so the handles may be used concurrently by several threads.
+    on platforms without `os.pread`, reads of each file are serialized.
+    """
+
+    def __init__(self):
+        super(FileHandlePool, self).__init__()
+        # map from file path to (file descriptor, lock)
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, file_path):
+        return file_path in self._handles
+
+    def open(self, file_path):
+        """
+        open the given file, if its not already open.
+
+        Args:
+            file_path (str): the path to the file to open.
+        """
+        with self._lock:
+            if file_path in self._handles:
+                return
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            self._handles[file_path] = (fd, threading.Lock())
+
+    def read(self, file_path, offset, size):
+        """
+        read bytes from an open file.
+        fewer bytes are returned when the read extends past the end of the file.
+
+        Args:
+            file_path (str): the path to a file already in the pool.
+            offset (int): the file offset from which to read.
+            size (int): the number of bytes to read.
+
+        Returns:
+            bytes: the data read from the file.
+
+        Raises:
+            KeyError: if the file is not open.
+        """
+        fd, lock = self._handles[file_path]
+
+        if hasattr(os, "pread"):
+            buf = os.pread(fd, size, offset)
+            if len(buf) == size:
+                # this is the common case, return early
+                return buf
+
+            # short read, continue until EOF
+            chunks = [buf]
+            found = len(buf)
+            while found < size:
+                buf = os.pread(fd, size - found, offset + found)
+                if not buf:
+                    break
+                chunks.append(buf)
+                found += len(buf)
+            return b"".join(chunks)
+
+        with lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            chunks = []
+            found = 0
+            while found < size:
+                buf = os.read(fd, size - found)
+                if not buf:
+                    break
+                chunks.append(buf)
+                found += len(buf)
+            return b"".join(chunks)
+
+    def readinto(self, file_path, offset, view):
+        """
+        read bytes from an open file directly into the given buffer.
+
+        Args:
+            file_path (str): the path to a file already in the pool.
+            offset (int): the file offset from which to read.
+            view (memoryview): the writable buffer to fill.
+
+        Returns:
+            int: the number of bytes read, fewer than the size of the buffer when the read extends past the end of the file.
+
+        Raises:
+            KeyError: if the file is not open.
+        """
+        fd, _ = self._handles[file_path]
+
+        if hasattr(os, "preadv"):
+            size = len(view)
+            found = os.preadv(fd, [view], offset)
+            # short read, continue until EOF
+            while 0 < found < size:
+                n = os.preadv(fd, [view[found:]], offset + found)
+                if not n:
+                    break
+                found += n
+            return found
+
+        buf = self.read(file_path, offset, len(view))
+        view[:len(buf)] = buf
+        return len(buf)
+
+    def close(self):
+        with self._lock:
+            for fd, _ in self._handles.values():
+                os.close(fd)
+            self._handles = {}
+
+
+class PageReadahead(object):
+    """
+    detects sequential reads of pages, and then reads ahead in large runs.
+    while the current run is consumed, a background thread fetches the next.
+
+    pages are numbered in the order the caller reads them,
+      so a store tracks physical and logical page reads separately.
+    see `_read_logical_pages` for reading a run of logical pages.
+
+    this turns a scan of thousands of small, blocking page reads into a few large reads,
+      which matters on slow storage.
+    """
+
+    def __init__(self, read_pages, page_size, page_count, window=DEFAULT_READAHEAD_PAGES):
+        """
+        Args:
+            read_pages (Callable[[int, int], bytes]): read the given number of pages from the given page number.
+            page_size (int): the size of a page.
+            page_count (int): the number of pages.
+            window (int): the number of pages to read at once.
+        """
+        super(PageReadahead, self).__init__()
+        self._read_pages = read_pages
+        self._page_size = page_size
+        self._page_count = page_count
+        self._window = window
+        self._lock = threading.Lock()
+
+        # the last page requested, and the number of sequential requests leading up to it.
+        self._last_page_number = None
+        self._streak = 0
+
+        # the run of pages already read: (first page number, bytes)
+        self._current = None
+        # the run of pages being read in the background: (first page number, page count, thread, result)
+        self._pending = None
+
+    def _get_current_page(self, page_number):
+        if self._current is None:
+            return None
+
+        first, buf = self._current
+        offset = (page_number - first) * self._page_size
+        if offset < 0 or offset >= len(buf):
+            return None
+        return buf[offset:offset + self._page_size]
+
+    def _start_prefetch(self, first):
+        self._pending = None
+        if first >= self._page_count:
+            return
+
+        count = min(self._window, self._page_count - first)
+        result = {}
+
+        def prefetch():
+            try:
+                result["buf"] = self._read_pages(first, count)
+            except Exception:
+                # let the page be read again in the foreground, where the error is raised to the caller.
+                logger.debug("failed to read ahead pages %s-%s", hex(first), hex(first + count), exc_info=True)
+
+        thread = threading.Thread(target=prefetch)
+        thread.daemon = True
+        thread.start()
+        self._pending = (first, count, thread, result)
+
+    def _get_pending_page(self, page_number):
+        if self._pending is None:
+            return None
+
+        first, count, thread, result = self._pending
+        if not first <= page_number < first + count:
+            return None
+
+        thread.join()
+        self._pending = None
+        if "buf" not in result:
+            return None
+
+        self._current = (first, result["buf"])
+        self._start_prefetch(first + count)
+        return self._get_current_page(page_number)
+
+    def get_page(self, page_number):
+        """
+        fetch the bytes of the given page, if it has been, or should be, read ahead.
+
+        Args:
+            page_number (int): the page number.
+
+        Returns:
+            bytes: the page contents, or None if the caller should read the page itself.
+        """
+        with self._lock:
+            if self._last_page_number is not None and page_number == self._last_page_number + 1:
+                self._streak += 1
+            else:
+                self._streak = 0
+            self._last_page_number = page_number
+
+            buf = self._get_current_page(page_number)
+            if buf is not None:
+                return buf
+
+            buf = self._get_pending_page(page_number)
+            if buf is not None:
+                return buf
+
+            if self._streak < READAHEAD_TRIGGER:
+                return None
+
+            # sequential access: read this run now, and the next one in the background.
+            count = min(self._window, self._page_count - page_number)
+            self._current = (page_number, self._read_pages(page_number, count))
+            self._start_prefetch(page_number + count)
+            return self._get_current_page(page_number)
+
+    def close(self):
+        """
+        wait for any background read, and release the pages read ahead.
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending[2].join()
+            self._pending = None
+            self._current = None
+
+
+def _read_logical_pages(read_physical_pages, mapping, page_size, page_count, logical_page_number, count):
+    """
+    read the physical pages behind a run of logical pages, in physical order,
+      coalescing physically adjacent pages into a single read.
+
+    Args:
+        read_physical_pages (Callable[[int, int], bytes]): read the given number of pages from the given physical page number.
+        mapping (Mapping): the map from logical to physical page numbers.
+        page_size (int): the size of a page.
+        page_count (int): the number of physical pages in the file.
+        logical_page_number (int): the first logical page number.
+        count (int): the number of logical pages.
+
+    Returns:
+        bytes: the contents of the logical pages, in logical order.
+          pages that are not mapped to a physical page are left zeroed.
+    """
+    # pairs of (physical page number, index in the run).
+    slots = []
+    for i in range(count):
+        if not mapping.is_logical_page_mapped(logical_page_number + i):
+            continue
+        physical_page_number = mapping.get_physical_page_number(logical_page_number + i)
+        if physical_page_number < page_count:
+            slots.append((physical_page_number, i))
+    slots.sort()
+
+    buf = bytearray(page_size * count)
+    start = 0
+    while start < len(slots):
+        end = start + 1
+        while end < len(slots) and slots[end][0] == slots[end - 1][0] + 1:
+            end += 1
+
+        pages = read_physical_pages(slots[start][0], end - start)
+        for j in range(start, end):
+            _, i = slots[j]
+            offset = (j - start) * page_size
+            buf[i * page_size:(i + 1) * page_size] = pages[offset:offset + page_size]
+        start = end
+    return bytes(buf)
+
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions", "count", "size", "max_size"])
+
+
+class LRUCache(object):
+    """
+    a cache bounded by the total size of its items.
+    when full, the least recently used items are evicted.
+    """
+
+    def __init__(self, max_size, sizeof=len):
+        """
+        Args:
+            max_size (int): the budget for the total size of the cached items.
+            sizeof (callable): compute the size of an item.
+        """
+        super(LRUCache, self).__init__()
+        self.max_size = max_size
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+
+        # map from key to (value, size), ordered from least to most recently used.
+        self._items = OrderedDict()
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """
+        fetch an item, marking it most recently used.
+
+        Args:
+            key (hashable): the key of the item.
+            default (object): the value to return when the item is not cached.
+
+        Returns:
+            object: the cached item, or the default value.
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+
+            self._touch(key, item)
+            self.hits += 1
+            return item[0]
+
+    def _touch(self, key, item):
+        # move the item to the most recently used position.
+        del self._items[key]
+        self._items[key] = item
+
+    def _evict(self):
+        """
+        remove an item to make space.
+
+        Returns:
+            int: the size of the evicted item.
+        """
+        _, (_, size) = self._items.popitem(last=False)
+        return size
+
+    def put(self, key, value):
+        """
+        add an item, evicting least recently used items to stay within budget.
+        items larger than the entire budget are not cached.
+
+        Args:
+            key (hashable): the key of the item.
+            value (object): the item.
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+
+            if size > self.max_size:
+                return
+
+            while self._items and self.size + size > self.max_size:
+                self.size -= self._evict()
+                self.evictions += 1
+
+            self._items[key] = (value, size)
+            self.size += size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    @property
+    def stats(self):
+        """
+        Returns:
+            CacheStats: counters that describe the effectiveness of the cache.
+        """
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._items), self.size, self.max_size)
+
+
+class ClockCache(LRUCache):
+    """
+    a cache bounded by the total size of its items, using CLOCK (second chance) eviction.
+    this approximates LRU, but a hit only sets a flag, rather than reordering the items.
+    """
+
+    def __init__(self, max_size, sizeof=len):
+        super(ClockCache, self).__init__(max_size, sizeof=sizeof)
+        # the keys of the items accessed since the clock hand last passed them.
+        self._referenced = set()
+
+    def _touch(self, key, item):
+        self._referenced.add(key)
+
+    def _evict(self):
+        while True:
+            key, item = self._items.popitem(last=False)
+            if key not in self._referenced:
+                return item[1]
+
+            # second chance: clear the flag and move the item behind the clock hand.
+            self._referenced.discard(key)
+            self._items[key] = item
+
+    def clear(self):
+        super(ClockCache, self).clear()
+        self._referenced.clear()
+
+
+class LogicalDataStore(object):
+    """
+    provides an interface for accessing data by logical page or object id.
+    
+    Args:
+        cim (CIM): the repo
+        file_path (str): the file containing the data pages
+        mapping (Mapping): the data mapping.
+        use_mmap (bool): memory map the data file, rather than reading each page.
+        handles (FileHandlePool): open file handles to read from, rather than opening the file for each page.
+        page_cache_size (int): the memory budget, in bytes, for caching parsed pages. zero disables the cache.
+        readahead (bool): detect sequential page reads, and read ahead in large runs. see `PageReadahead`.
+    """
+
+    def __init__(self, cim, file_path, mapping, use_mmap=False, handles=None,
+                 page_cache_size=DEFAULT_DATA_PAGE_CACHE_SIZE, readahead=False):
+        super(LogicalDataStore, self).__init__()
+        self._cim = cim
+        self._file_path = file_path
+        self._mapping = mapping
+        self._handles = handles
+        self._file_size = os.path.getsize(file_path)
+        self.page_count = self._file_size // INDEX_PAGE_SIZE
+
+        self._mapped_file = None
+        if use_mmap:
+            self._mapped_file = MappedPageFile(file_path, DATA_PAGE_SIZE)
+
+        # the operating system reads ahead in the memory map.
+        self._readahead = None
+        self._logical_readahead = None
+        if readahead and not use_mmap:
+            self._readahead = PageReadahead(self._read_physical_pages, DATA_PAGE_SIZE, self.page_count)
+            self._logical_readahead = PageReadahead(self._read_logical_pages, DATA_PAGE_SIZE,
+                                                    mapping.mapping_entry_count)
+
+        # cache of logical page number to DataPage
+        self.page_cache = LRUCache(page_cache_size, sizeof=DataPage.estimate_size)
+
+    def attach_handles(self, handles):
+        """
+        read pages through the given open file handles from now on,
+          such as when the repository is opened after the store is created.
+
+        Args:
+            handles (FileHandlePool): the open file handles.
+        """
+        self._handles = handles
+
+    def close(self):
+        """
+        release any resources held open by the store.
+        """
+        self.page_cache.clear()
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+        if self._readahead is not None:
+            self._readahead.close()
+        if self._logical_readahead is not None:
+            self._logical_readahead.close()
+
+    def _read_physical_pages(self, physical_page_number, count):
+        offset = DATA_PAGE_SIZE * physical_page_number
+        size = DATA_PAGE_SIZE * count
+
+        if self._handles is not None and self._file_path in self._handles:
+            return self._handles.read(self._file_path, offset, size)
+
+        if not os.path.exists(self._file_path):
+            raise MissingDataFileError()
+
+        with open(self._file_path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def _read_logical_pages(self, logical_page_number, count):
+        return _read_logical_pages(self._read_physical_pages, self._mapping, DATA_PAGE_SIZE, self.page_count,
+                                   logical_page_number, count)
+
+    def get_physical_page_buffer(self, physical_page_number):
+        """
+        fetch the bytes of the page at the give physical index.
+        
+        Args:
+            physical_page_number: the physical page number to fetch
+
+        Returns:
+            bytes: the raw page contents.
+              when memory mapped on python 3, this is a `memoryview` of the mapping.
+        """
+        if physical_page_number >= self.page_count:
+            raise IndexError(physical_page_number)
+
+        if self._mapped_file is not None:
+            return self._mapped_file.get_page(physical_page_number)
+
+        if self._readahead is not None:
+            buf = self._readahead.get_page(physical_page_number)
+            if buf is not None:
+                return buf
+
+        return self._read_physical_pages(physical_page_number, 1)
+
+    def get_logical_page_buffer(self, logical_page_number):
+        """
+        fetch the bytes of the page at the give logical index.
+        
+        Args:
+            logical_page_number: the logical page number to fetch
+
+        Returns:
+            bytes: the raw page contents.
+        """
+        if not self._mapping.is_logical_page_mapped(logical_page_number):
+            raise UnmappedPage(logical_page_number)
+        pnum = self._mapping.get_physical_page_number(logical_page_number)
+        if pnum >= self.page_count:
+            raise IndexError(pnum)
+
+        if self._logical_readahead is not None:
+            buf = self._logical_readahead.get_page(logical_page_number)
+            if buf is not None:
+                return buf
+
+        return self.get_physical_page_buffer(pnum)
+
+    def _read_logical_page_into(self, logical_page_number, view):
+        """
+        copy the leading bytes of the page at the given logical index into the given buffer,
+          reading from the file directly into the buffer, when possible.
+
+        Args:
+            logical_page_number (int): the logical page number to fetch.
+            view (memoryview): the writable buffer to fill, no larger than a page.
+        """
+        if not self._mapping.is_logical_page_mapped(logical_page_number):
+            raise UnmappedPage(logical_page_number)
+        physical_page_number = self._mapping.get_physical_page_number(logical_page_number)
+
+        if physical_page_number >= self.page_count:
+            raise IndexError(physical_page_number)
+
+        offset = DATA_PAGE_SIZE * physical_page_number
+        if self._mapped_file is not None:
+            view[:] = self._mapped_file.get_page(physical_page_number)[:len(view)]
+
+        elif self._handles is not None and self._file_path in self._handles:
+            self._handles.readinto(self._file_path, offset, view)
+
+        else:
+            if not os.path.exists(self._file_path):
+                raise MissingDataFileError()
+
+            with open(self._file_path, "rb") as f:
+                f.seek(offset)
+                f.readinto(view)
+
+    def get_page(self, logical_page_number):
+        """
+        fetch the parsed page at the give logical index.
+        
+        Args:
+            logical_page_number: the logical page number to fetch
+
+        Returns:
+            DataPage: the parsed page.
+        """
+        page = self.page_cache.get(logical_page_number)
+        if page is not None:
+            return page
+
+        pbuf = self.get_logical_page_buffer(logical_page_number)
+        pnum = self._mapping.get_physical_page_number(logical_page_number)
+        page = DataPage(pbuf, logical_page_number, pnum)
+        self.page_cache.put(logical_page_number, page)
+        return page
+
+    def get_object_buffer(self, key):
+        """
+        fetch the raw bytes of the object identified by the given key.
+
+        Args:
+            key (Key): the key of the object to fetch.
+
+        Returns:
+            Union[bytes, bytearray]: the raw bytes of the object.
+              objects that span pages are assembled into, and returned as, a `bytearray`.
+        """
+        if not key.is_data_reference:
+            raise RuntimeError("Key is not data reference: %s", str(key))
+
+        return self._get_object_buffer(self.get_page(key.data_page), key)
+
+    def _get_object_buffer(self, page, key):
+        # this logic of this function is a bit more complex than
+        #   we'd want, since we have to handle the case where an
+        #   item's data spans multiple pages.
+        target_length = key.data_length
+        first_data = page.get_data_by_key(key)
+
+        # this is the common case, return early
+        if target_length == len(first_data):
+            # when memory mapped, this copies the object out of the mapping.
+            return bytes(first_data)
+
+        # here we handle data that spans multiple pages.
+        # the object is assembled in a single buffer, and each page is read directly into its place,
+        #   so the bytes of large objects are copied just once.
+        data = bytearray(target_length)
+        view = memoryview(data)
+        view[:len(first_data)] = first_data
+        found_length = len(first_data)
+
+        i = 1
+        while found_length < target_length:
+            # the entire page is used for this item, except for the last page.
+            chunk_size = min(DATA_PAGE_SIZE, target_length - found_length)
+            self._read_logical_page_into(key.data_page + i, view[found_length:found_length + chunk_size])
+            found_length += chunk_size
+            i += 1
+
+        return data
+
+    def _get_physical_order(self, logical_page_number):
+        if not self._mapping.is_logical_page_mapped(logical_page_number):
+            # sort unmapped pages last, and let the fetch report the error.
+            return 1, logical_page_number
+        return 0, self._mapping.get_physical_page_number(logical_page_number)
+
+    def get_object_buffers(self, keys, skip_missing=False):
+        """
+        fetch the raw bytes of many objects.
+
+        the keys are grouped by data page, and the pages are visited in physical order,
+          so each page is read and parsed once, and the data file is read sequentially.
+        therefore, the objects are not yielded in the order of the given keys.
+
+        Args:
+            keys (Iterable[Key]): the keys of the objects to fetch.
+            skip_missing (bool): log and skip keys whose objects are not found on their page,
+              rather than raising `IndexKeyNotFoundError`.
+
+        Yields:
+            Tuple[Key, Union[bytes, bytearray]]: the key and raw bytes of each object, see `get_object_buffer`.
+        """
+        # map from logical page number to the keys on that page, in the given order.
+        keys_by_page = {}
+        for key in keys:
+            if not key.is_data_reference:
+                raise RuntimeError("Key is not data reference: %s", str(key))
+            keys_by_page.setdefault(key.data_page, []).append(key)
+
+        for logical_page_number in sorted(keys_by_page, key=self._get_physical_order):
+            page = self.get_page(logical_page_number)
+            for key in keys_by_page[logical_page_number]:
+                try:
+                    buf = self._get_object_buffer(page, key)
+                except IndexKeyNotFoundError:
+                    if not skip_missing:
+                        raise
+                    logger.warning("Expected object not found in object store: %s", key)
+                    continue
+                yield key, buf
+
+
+class InvalidMappingEntryIndex(Exception):
+    pass
+
+
+class InvalidPhysicalPageNumber(Exception):
     pass
 
 
@@ -699,20 +2025,81 @@ class LogicalIndexStore(object):
     indexing logic should go at a higher level.
     """
 
-    def __init__(self, cim, file_path, mapping):
+    def __init__(self, cim, file_path, mapping, use_mmap=False, handles=None, intern_keys=False, readahead=False):
         """
         
         Args:
             cim (CIM): the CIM repository
             file_path (str): the file containing the index
             mapping (Mapping): the page mapping
+            use_mmap (bool): memory map the index file, rather than reading each page.
+            handles (FileHandlePool): open file handles to read from, rather than opening the file for each page.
+            intern_keys (bool): decode the keys of `get_fast_page` pages up front, interning the parts.
+            readahead (bool): detect sequential page reads, and read ahead in large runs. see `PageReadahead`.
+        """
+        super(LogicalIndexStore, self).__init__()
+        self._cim = cim
+        self._file_path = file_path
+        self._mapping = mapping
+        self._handles = handles
+        self._file_size = os.path.getsize(file_path)
+        self.page_count = self._file_size // INDEX_PAGE_SIZE
+
+        self._mapped_file = None
+        if use_mmap:
+            self._mapped_file = MappedPageFile(file_path, INDEX_PAGE_SIZE)
+
+        # the operating system reads ahead in the memory map.
+        self._readahead = None
+        self._logical_readahead = None
+        if readahead and not use_mmap:
+            self._readahead = PageReadahead(self._read_physical_pages, INDEX_PAGE_SIZE, self.page_count)
+            self._logical_readahead = PageReadahead(self._read_logical_pages, INDEX_PAGE_SIZE,
+                                                    mapping.mapping_entry_count)
+
+        # the key parts of all pages from this store, when interning keys.
+        self.key_parts = None
+        if intern_keys:
+            self.key_parts = StringInterner()
+
+    def attach_handles(self, handles):
+        """
+        read pages through the given open file handles from now on,
+          such as when the repository is opened after the store is created.
+
+        Args:
+            handles (FileHandlePool): the open file handles.
         """
-        super(LogicalIndexStore, self).__init__()
-        self._cim = cim
-        self._file_path = file_path
-        self._mapping = mapping
-        self._file_size = os.path.getsize(file_path)
-        self.page_count = self._file_size // INDEX_PAGE_SIZE
+        self._handles = handles
+
+    def close(self):
+        """
+        release any resources held open by the store.
+        """
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+        if self._readahead is not None:
+            self._readahead.close()
+        if self._logical_readahead is not None:
+            self._logical_readahead.close()
+
+    def _read_physical_pages(self, physical_page_number, count):
+        offset = INDEX_PAGE_SIZE * physical_page_number
+        size = INDEX_PAGE_SIZE * count
+
+        if self._handles is not None and self._file_path in self._handles:
+            return self._handles.read(self._file_path, offset, size)
+
+        if not os.path.exists(self._file_path):
+            raise MissingIndexFileError()
+
+        with open(self._file_path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def _read_logical_pages(self, logical_page_number, count):
+        return _read_logical_pages(self._read_physical_pages, self._mapping, INDEX_PAGE_SIZE, self.page_count,
+                                   logical_page_number, count)
 
     def get_physical_page_buffer(self, index):
         """
@@ -723,16 +2110,20 @@ class LogicalIndexStore(object):
 
         Returns:
             bytes: the raw data at the given page.
+              when memory mapped on python 3, this is a `memoryview` of the mapping.
         """
-        if not os.path.exists(self._file_path):
-            raise MissingIndexFileError()
-
         if index >= self.page_count:
             raise IndexError(index)
 
-        with open(self._file_path, "rb") as f:
-            f.seek(INDEX_PAGE_SIZE * index)
-            return f.read(INDEX_PAGE_SIZE)
+        if self._mapped_file is not None:
+            return self._mapped_file.get_page(index)
+
+        if self._readahead is not None:
+            buf = self._readahead.get_page(index)
+            if buf is not None:
+                return buf
+
+        return self._read_physical_pages(index, 1)
 
     def get_logical_page_buffer(self, logical_page_number):
         """
@@ -745,6 +2136,14 @@ class LogicalIndexStore(object):
             bytes: the raw data at the given page.
         """
         pnum = self._mapping.get_physical_page_number(logical_page_number)
+        if pnum >= self.page_count:
+            raise IndexError(pnum)
+
+        if self._logical_readahead is not None:
+            buf = self._logical_readahead.get_page(logical_page_number)
+            if buf is not None:
+                return buf
+
         return self.get_physical_page_buffer(pnum)
 
     def get_page(self, logical_page_number):
@@ -757,7 +2156,7 @@ class LogicalIndexStore(object):
         Returns:
             IndexPage: the parsed index page.
         """
-        if logical_page_number > self._mapping.map.header.mapping_entry_count:
+        if logical_page_number > self._mapping.mapping_entry_count:
             raise InvalidMappingEntryIndex()
 
         pnum = self._mapping.get_physical_page_number(logical_page_number)
@@ -766,6 +2165,24 @@ class LogicalIndexStore(object):
         p.vsParse(pagebuf)
         return p
 
+    def get_fast_page(self, logical_page_number):
+        """
+        fetch an index page given a logical page number, decoded in bulk.
+        prefer this to `get_page` unless the raw structure is needed.
+
+        Args:
+            logical_page_number: the logical page number
+
+        Returns:
+            FastIndexPage: the decoded index page.
+        """
+        if logical_page_number > self._mapping.mapping_entry_count:
+            raise InvalidMappingEntryIndex()
+
+        pnum = self._mapping.get_physical_page_number(logical_page_number)
+        pagebuf = self.get_logical_page_buffer(logical_page_number)
+        return FastIndexPage(pagebuf, logical_page_number, pnum, interner=self.key_parts)
+
     @cached_property
     def root_page_number(self):
         """
@@ -775,7 +2192,7 @@ class LogicalIndexStore(object):
             int: the logical page number.
         """
         if self._cim.cim_type == CIM_TYPE_WIN7:
-            return int(self._mapping.map.entries[0x0].used_space)
+            return int(self._mapping.get_entry(0x0).used_space)
         elif self._cim.cim_type == CIM_TYPE_XP:
             return self.get_page(0).header.root_page
         else:
@@ -795,14 +2212,51 @@ class LogicalIndexStore(object):
 class CachedLogicalIndexStore(object):
     """
     acts like a LogicalIndexStore, except it caches pages in memory for faster access.
+    pages are decoded with `LogicalIndexStore.get_fast_page`.
+
+    the root page and upper levels of the tree are pinned in memory,
+      since every lookup traverses them.
+    other pages are held in a bounded cache, and evicted when its full.
     """
 
-    def __init__(self, index_store):
+    def __init__(self, index_store, cache=None, pinned_levels=DEFAULT_PINNED_INDEX_LEVELS):
+        """
+        Args:
+            index_store (LogicalIndexStore): the index store to wrap.
+            cache (LRUCache): the cache for unpinned pages, such as an `LRUCache` or `ClockCache`.
+              defaults to an LRU cache of `DEFAULT_INDEX_PAGE_CACHE_SIZE` pages.
+            pinned_levels (int): the number of levels of the tree, from the root, to pin.
+        """
         super(CachedLogicalIndexStore, self).__init__()
         self._index_store = index_store
 
-        # cache
-        self._pages = {}
+        if cache is None:
+            cache = LRUCache(DEFAULT_INDEX_PAGE_CACHE_SIZE, sizeof=lambda page: 1)
+        self.page_cache = cache
+
+        self._pinned_levels = pinned_levels
+        # map from logical page number to depth in the tree, for pages that should be pinned
+        self._pinned_depths = {}
+        # map from logical page number to IndexPage
+        self._pinned_pages = {}
+
+    def close(self):
+        self.page_cache.clear()
+        self._pinned_pages = {}
+        self._pinned_depths = {}
+        self._index_store.close()
+
+    @property
+    def stats(self):
+        """
+        Returns:
+            CacheStats: counters that describe the effectiveness of the cache of unpinned pages.
+        """
+        return self.page_cache.stats
+
+    @property
+    def pinned_page_count(self):
+        return len(self._pinned_pages)
 
     def get_physical_page_buffer(self, index):
         return self._index_store.get_physical_page_buffer(index)
@@ -810,10 +2264,41 @@ class CachedLogicalIndexStore(object):
     def get_logical_page_buffer(self, index):
         return self._index_store.get_logical_page_buffer(index)
 
+    def _get_pinned_depth(self, index):
+        if self._pinned_levels > 0 and not self._pinned_depths:
+            self._pinned_depths[self.root_page_number] = 0
+        return self._pinned_depths.get(index)
+
+    def _pin_page(self, page, depth):
+        self._pinned_pages[page.logical_page_number] = page
+
+        if depth + 1 >= self._pinned_levels:
+            return
+
+        for i in range(page.key_count + 1):
+            child_index = page.get_child(i)
+            if child_index == INDEX_PAGE_INVALID or child_index == INDEX_PAGE_INVALID2:
+                continue
+            self._pinned_depths.setdefault(child_index, depth + 1)
+
     def get_page(self, index):
-        if index not in self._pages:
-            self._pages[index] = self._index_store.get_page(index)
-        return self._pages[index]
+        page = self._pinned_pages.get(index)
+        if page is not None:
+            return page
+
+        page = self.page_cache.get(index)
+        if page is not None:
+            return page
+
+        page = self._index_store.get_fast_page(index)
+
+        depth = self._get_pinned_depth(index)
+        if depth is not None and depth < self._pinned_levels:
+            self._pin_page(page, depth)
+        else:
+            self.page_cache.put(index, page)
+
+        return page
 
     @property
     def root_page_number(self):
@@ -824,72 +2309,289 @@ class CachedLogicalIndexStore(object):
         return self.get_page(self.root_page_number)
 
 
+class IndexQueryStats(object):
+    """
+    counters that describe the work done by a single index query.
+    """
+
+    def __init__(self):
+        super(IndexQueryStats, self).__init__()
+        # the number of index pages read.
+        self.pages_visited = 0
+        # the number of keys decoded and compared against the query.
+        self.keys_compared = 0
+        # the number of keys yielded.
+        self.matches = 0
+
+    def __repr__(self):
+        return "IndexQueryStats(pages_visited=%d, keys_compared=%d, matches=%d)" % (
+            self.pages_visited, self.keys_compared, self.matches)
+
+
+class _PageKeyStrings(object):
+    """
+    a read-only sequence of the key strings on an index page, decoded on access,
+      so that the keys can be searched with `bisect`.
+    """
+
+    def __init__(self, page, stats):
+        super(_PageKeyStrings, self).__init__()
+        self._page = page
+        self._stats = stats
+
+    def __len__(self):
+        return self._page.key_count
+
+    def __getitem__(self, key_index):
+        self._stats.keys_compared += 1
+        return str(self._page.get_key(key_index))
+
+
+class _InternedPageKey(object):
+    """
+    a key on an interned index page, which compares to strings by its part ids.
+    see `_PageKeyIds`.
+    """
+    __slots__ = ("_keys", "_key_ids")
+
+    def __init__(self, keys, key_ids):
+        self._keys = keys
+        self._key_ids = key_ids
+
+    def __lt__(self, other):
+        return self._keys.compare(self._key_ids, other) < 0
+
+    def __eq__(self, other):
+        return self._keys.compare(self._key_ids, other) == 0
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def startswith(self, prefix):
+        return self._keys.has_prefix(self._key_ids, prefix)
+
+
+class _PageKeyIds(object):
+    """
+    a read-only sequence of the keys on an interned index page, see `FastIndexPage`,
+      so that the keys can be searched with `bisect` without building their strings.
+
+    the query is split into parts, and the parts are looked up in the interner once.
+    then, the leading parts that a key shares with the query, like `NS_`/`CD_`, compare by id,
+      and only the first part that differs compares by string.
+    """
+
+    def __init__(self, page, stats):
+        super(_PageKeyIds, self).__init__()
+        self._page = page
+        self._stats = stats
+        self._key_parts = page.key_parts
+        # the most recent query string, its parts, and their interned ids, or None for parts not interned.
+        self._query = None
+        self._query_parts = None
+        self._query_ids = None
+
+    def __len__(self):
+        return self._page.key_count
+
+    def __getitem__(self, key_index):
+        self._stats.keys_compared += 1
+        return _InternedPageKey(self, self._page.get_key_ids(key_index))
+
+    def _split_query(self, query):
+        if query != self._query:
+            self._query = query
+            self._query_parts = query.split("/")
+            self._query_ids = [self._key_parts.get_id(part) for part in self._query_parts]
+        return self._query_parts, self._query_ids
+
+    def compare(self, key_ids, query):
+        """
+        compare the key with the given part ids to the query string, in string order.
+
+        Returns:
+            int: negative, zero, or positive, when the key sorts before, the same as, or after the query.
+        """
+        query_parts, query_ids = self._split_query(query)
+        key_parts = self._key_parts
+
+        key_last = len(key_ids) - 1
+        query_last = len(query_parts) - 1
+        for i in range(min(len(key_ids), len(query_parts))):
+            if key_ids[i] == query_ids[i]:
+                continue
+
+            part = key_parts[key_ids[i]]
+            query_part = query_parts[i]
+            if part == query_part:
+                # the part was interned after the query was split.
+                continue
+
+            # the parts are joined by "/", which sorts after some characters, like the "." of data references.
+            # so, compare each part followed by its separator, as they are within the strings.
+            if i != key_last:
+                part += "/"
+            if i != query_last:
+                query_part += "/"
+            return -1 if part < query_part else 1
+
+        # one is the start of the other.
+        return len(key_ids) - len(query_parts)
+
+    def has_prefix(self, key_ids, prefix):
+        """
+        does the key with the given part ids start with the prefix string?
+        """
+        prefix_parts, prefix_ids = self._split_query(prefix)
+        key_parts = self._key_parts
+
+        last = len(prefix_parts) - 1
+        if len(key_ids) <= last:
+            return False
+
+        for i in range(last):
+            if key_ids[i] != prefix_ids[i] and key_parts[key_ids[i]] != prefix_parts[i]:
+                return False
+
+        # the last part of the prefix may be the start of a part of the key.
+        return key_ids[last] == prefix_ids[last] or key_parts[key_ids[last]].startswith(prefix_parts[last])
+
+
+def _get_page_keys(page, stats):
+    """
+    get the keys of the given index page as a sequence that can be searched with `bisect`.
+
+    Args:
+        page (FastIndexPage): the index page.
+        stats (IndexQueryStats): the counters to update.
+
+    Returns:
+        Union[_PageKeyStrings, _PageKeyIds]: the keys of the page.
+    """
+    if getattr(page, "key_parts", None) is not None:
+        return _PageKeyIds(page, stats)
+    return _PageKeyStrings(page, stats)
+
+
+def _prefix_range(keys, prefix):
+    """
+    find the range of sorted keys that start with the given prefix.
+
+    Args:
+        keys (Union[Sequence[str], _PageKeyIds]): the sorted keys.
+        prefix (str): the key prefix.
+
+    Returns:
+        Tuple[int, int]: the index of the first matching key, and the index after the last matching key.
+    """
+    start = bisect.bisect_left(keys, prefix, 0, len(keys))
+
+    # the keys with the prefix are contiguous, and sort before the keys that don't,
+    #   so search for the first key, at or after the start, that doesn't have the prefix.
+    # this is the same as the lower bound of `prefix + "\xff"`, without assuming the alphabet.
+    lo = start
+    hi = len(keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if keys[mid].startswith(prefix):
+            lo = mid + 1
+        else:
+            hi = mid
+    return start, lo
+
+
 class Index(object):
-    def __init__(self, cim_type, index_store):
+    def __init__(self, cim_type, index_store, cache=None, pinned_levels=DEFAULT_PINNED_INDEX_LEVELS):
+        """
+        Args:
+            cim_type (str): the repository type.
+            index_store (LogicalIndexStore): the source of index pages.
+            cache (LRUCache): the cache for index pages, see `CachedLogicalIndexStore`.
+            pinned_levels (int): the number of levels of the tree, from the root, to keep in memory.
+        """
         super(Index, self).__init__()
         self.cim_type = cim_type
-        self._index_store = CachedLogicalIndexStore(index_store)
+        self._index_store = CachedLogicalIndexStore(index_store, cache=cache, pinned_levels=pinned_levels)
+        # the counters of the most recent `iter_prefix` query.
+        self.last_query_stats = IndexQueryStats()
+
+    @property
+    def cache_stats(self):
+        """
+        Returns:
+            CacheStats: counters that describe the effectiveness of the index page cache.
+        """
+        return self._index_store.stats
 
     LEFT_CHILD_DIRECTION = 0
     RIGHT_CHILD_DIRECTION = 1
 
-    def _lookup_keys_child(self, key, page, i, direction):
-        child_index = page.get_child(i + direction)
-        if child_index == INDEX_PAGE_INVALID or child_index == INDEX_PAGE_INVALID2:
-            return []
+    def _is_valid_child(self, child_index):
+        return child_index != INDEX_PAGE_INVALID and child_index != INDEX_PAGE_INVALID2
 
-        child_page = self._index_store.get_page(child_index)
-        return self._lookup_keys(key, child_page)
+    def iter_keys(self, key):
+        """
+        query the index keys that start with the given prefix, yielding them as they are found.
+        this walks the tree with an explicit stack rather than recursion,
+          so the caller can stop early without the remaining pages being read.
 
-    def _lookup_keys_left(self, key, page, i):
-        return self._lookup_keys_child(key, page, i, self.LEFT_CHILD_DIRECTION)
+        the keys are yielded in the same order as `lookup_keys`.
 
-    def _lookup_keys_right(self, key, page, i):
-        return self._lookup_keys_child(key, page, i, self.RIGHT_CHILD_DIRECTION)
+        Args:
+            key (Key): the key prefix.
 
-    def _lookup_keys(self, key, page):
+        Yields:
+            Key: the matching keys.
+        """
         skey = str(key)
-        key_count = page.key_count
 
-        logger.debug("index lookup: %s: page: %s", key.human_format, hex(page.logical_page_number))
+        # the pending work, in reverse order.
+        # each entry is either a logical page number to visit, or a matching key to yield.
+        stack = [self._index_store.root_page_number]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, Key):
+                yield item
+                continue
 
-        matches = []
-        for i in range(key_count):
-            k = page.get_key(i)
-            sk = str(k)
+            page = self._index_store.get_page(item)
+            key_count = page.key_count
+
+            logger.debug("index lookup: %s: page: %s", key.human_format, hex(page.logical_page_number))
+
+            work = []
+            for i in range(key_count):
+                k = page.get_key(i)
+                sk = str(k)
 
-            if i != key_count - 1:
-                # not last
-                if skey in sk:
-                    matches.extend(self._lookup_keys_left(key, page, i))
-                    matches.append(k)
-                    matches.extend(self._lookup_keys_right(key, page, i))
-                    continue
-                if skey < sk:
-                    matches.extend(self._lookup_keys_left(key, page, i))
-                    break
-                if skey > sk:
-                    continue
-            else:
-                # last key
                 if skey in sk:
-                    matches.extend(self._lookup_keys_left(key, page, i))
-                    matches.append(k)
-                    matches.extend(self._lookup_keys_right(key, page, i))
+                    work.append(page.get_child(i + self.LEFT_CHILD_DIRECTION))
+                    work.append(k)
+                    work.append(page.get_child(i + self.RIGHT_CHILD_DIRECTION))
+                    if i != key_count - 1:
+                        continue
                     break
                 if skey < sk:
-                    matches.extend(self._lookup_keys_left(key, page, i))
+                    work.append(page.get_child(i + self.LEFT_CHILD_DIRECTION))
                     break
-                if skey > sk:
+                if i == key_count - 1:
                     # we have to be in this node for a reason,
                     #   so it must be the right child
-                    matches.extend(self._lookup_keys_right(key, page, i))
-                    break
-        return matches
+                    work.append(page.get_child(i + self.RIGHT_CHILD_DIRECTION))
+
+            for item in reversed(work):
+                if isinstance(item, Key) or self._is_valid_child(item):
+                    stack.append(item)
 
     def lookup_keys(self, key):
         """
         query the index keys that start with the given prefix.
+
+        note: this decides which keys match using string containment, rather than a prefix test,
+          so keys shared by adjacent subtrees may be returned more than once.
+        prefer `iter_prefix`/`lookup_prefix`, which return each matching key exactly once.
         
         Args:
             key (Key): the key prefix.
@@ -897,7 +2599,218 @@ class Index(object):
         Returns:
             List[Key]: the matching keys.
         """
-        return self._lookup_keys(key, self._index_store.root_page)
+        return list(self.iter_keys(key))
+
+    def _expand_prefix_page(self, page_number, prefix, stats):
+        """
+        find the matching keys and the children to visit on the given page, in order.
+
+        Args:
+            page_number (int): the logical page number.
+            prefix (str): the key prefix.
+            stats (IndexQueryStats): the counters to update.
+
+        Returns:
+            List[Union[Key, int]]: matching keys and the logical page numbers of subtrees to visit, in key order.
+        """
+        page = self._index_store.get_page(page_number)
+        stats.pages_visited += 1
+
+        logger.debug("index prefix lookup: %s: page: %s", prefix, hex(page.logical_page_number))
+
+        start, end = _prefix_range(_get_page_keys(page, stats), prefix)
+
+        # the child to the left of key `i` is child `i`, and to the right is child `i + 1`,
+        #   so visit children `start` through `end`, interleaved with the matching keys.
+        work = [page.get_child(start)]
+        for i in range(start, end):
+            work.append(page.get_key(i))
+            work.append(page.get_child(i + self.RIGHT_CHILD_DIRECTION))
+
+        return [item for item in work if isinstance(item, Key) or self._is_valid_child(item)]
+
+    def _iter_prefix(self, prefix, page_number, stats):
+        # the pending work, in reverse order.
+        # each entry is either a logical page number to visit, or a matching key to yield.
+        stack = [page_number]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, Key):
+                stats.matches += 1
+                yield item
+                continue
+
+            stack.extend(reversed(self._expand_prefix_page(item, prefix, stats)))
+
+    def iter_prefix(self, key):
+        """
+        query the index keys that start with the given prefix, yielding them in order as they are found.
+
+        each page is binary searched for the range of keys `[prefix, prefix + "\xff")`,
+          and only the children that overlap this range are visited.
+        the counters for the query are available in `last_query_stats`.
+
+        Args:
+            key (Key): the key prefix.
+
+        Yields:
+            Key: the matching keys.
+        """
+        stats = IndexQueryStats()
+        self.last_query_stats = stats
+        return self._iter_prefix(str(key), self._index_store.root_page_number, stats)
+
+    def iter_prefix_parallel(self, key, repo, processes=None, ordered=True):
+        """
+        query the index keys that start with the given prefix, walking subtrees in worker processes.
+
+        the upper levels of the tree are walked here, until there are a few subtrees per worker.
+        each worker opens the repository itself, walks the subtrees its given, and sends back the keys.
+        the counters in `last_query_stats` cover only the pages walked in this process.
+
+        Args:
+            key (Key): the key prefix.
+            repo (CIM): the repository from which this index was read, which the workers reopen.
+            processes (int): the number of worker processes, by default, the number of CPUs.
+            ordered (bool): yield the keys in order, like `iter_prefix`.
+              otherwise, yield the keys of each subtree as soon as it is complete.
+
+        Yields:
+            Key: the matching keys.
+        """
+        prefix = str(key)
+        stats = IndexQueryStats()
+        self.last_query_stats = stats
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        # expand the tree level by level, in order, until there's enough subtrees to go around.
+        work = [self._index_store.root_page_number]
+        while True:
+            subtree_count = sum(1 for item in work if not isinstance(item, Key))
+            if subtree_count == 0 or subtree_count >= PARALLEL_SUBTREES_PER_PROCESS * processes:
+                break
+
+            expanded = []
+            for item in work:
+                if isinstance(item, Key):
+                    expanded.append(item)
+                else:
+                    expanded.extend(self._expand_prefix_page(item, prefix, stats))
+            work = expanded
+
+        subtrees = [(item, prefix) for item in work if not isinstance(item, Key)]
+
+        pool = multiprocessing.Pool(processes,
+                                    initializer=_init_prefix_worker,
+                                    initargs=(repo.cim_type, repo.directory, repo.use_mmap))
+        completed = False
+        try:
+            if ordered:
+                results = pool.imap(_prefix_worker, subtrees)
+                for item in work:
+                    if isinstance(item, Key):
+                        stats.matches += 1
+                        yield item
+                    else:
+                        for k in next(results):
+                            yield Key(k)
+            else:
+                for item in work:
+                    if isinstance(item, Key):
+                        stats.matches += 1
+                        yield item
+                for keys in pool.imap_unordered(_prefix_worker, subtrees):
+                    for k in keys:
+                        yield Key(k)
+            completed = True
+        finally:
+            if completed:
+                # let the workers exit on their own, so they close their repositories.
+                pool.close()
+            else:
+                # such as on error, or when the caller stops early.
+                # the operating system releases the files of the killed workers.
+                pool.terminate()
+            pool.join()
+
+    def get(self, key):
+        """
+        fetch the index key that is exactly the given key,
+          or the given key followed by a data reference (like `.page.id.length`).
+
+        this walks from the root towards a single leaf, and stops at the first match.
+        the counters for the query are available in `last_query_stats`.
+
+        Args:
+            key (Key): the key to find.
+
+        Returns:
+            Key: the matching index key, or None if the key is not in the index.
+        """
+        skey = str(key)
+        # data references sort after the bare key, past any keys that extend it with lesser characters.
+        sref = skey + "."
+        stats = IndexQueryStats()
+        self.last_query_stats = stats
+
+        stack = [self._index_store.root_page_number]
+        while stack:
+            page = self._index_store.get_page(stack.pop())
+            stats.pages_visited += 1
+
+            keys = _get_page_keys(page, stats)
+            key_count = page.key_count
+
+            i = bisect.bisect_left(keys, skey, 0, key_count)
+            if i < key_count and keys[i] == skey:
+                stats.matches += 1
+                return page.get_key(i)
+
+            j = bisect.bisect_left(keys, sref, i, key_count)
+            if j < key_count and keys[j].startswith(sref):
+                stats.matches += 1
+                return page.get_key(j)
+
+            # the bare key may only be in child `i`, and a data reference only in child `j`.
+            # these are almost always the same child.
+            for child_index in ((j, i) if i != j else (i, )):
+                child = page.get_child(child_index)
+                if self._is_valid_child(child):
+                    stack.append(child)
+
+        return None
+
+    def lookup_prefix(self, key):
+        """
+        query the index keys that start with the given prefix.
+
+        Args:
+            key (Key): the key prefix.
+
+        Returns:
+            List[Key]: the matching keys, each exactly once, in order.
+        """
+        return list(self.iter_prefix(key))
+
+
+# the index used by a worker process of `Index.iter_prefix_parallel`.
+_worker_index = None
+
+
+def _init_prefix_worker(cim_type, directory, use_mmap):
+    global _worker_index
+    repo = CIM(cim_type, directory, use_mmap=use_mmap)
+    repo.open()
+    # worker processes don't run `atexit` handlers, but do run these finalizers when they exit.
+    multiprocessing.util.Finalize(repo, repo.close, exitpriority=0)
+    _worker_index = Index(cim_type, repo.logical_index_store)
+
+
+def _prefix_worker(args):
+    page_number, prefix = args
+    return [str(k) for k in _worker_index._iter_prefix(prefix, page_number, IndexQueryStats())]
 
 
 class MissingMappingFileError(Exception):
@@ -905,11 +2818,32 @@ class MissingMappingFileError(Exception):
 
 
 class CIM(object):
-    def __init__(self, cim_type, directory):
+    def __init__(self, cim_type, directory, use_mmap=False, data_page_cache_size=DEFAULT_DATA_PAGE_CACHE_SIZE,
+                 intern_index_keys=False, readahead=False, class_cache_size=DEFAULT_CLASS_CACHE_SIZE):
+        """
+        Args:
+            cim_type (str): the repository type, one of `CIM_TYPE_XP` or `CIM_TYPE_WIN7`.
+            directory (str): the directory containing the repository files.
+            use_mmap (bool): memory map OBJECTS.DATA and INDEX.BTR, rather than reading each page.
+              call `close()`, or use the repository as a context manager, to release the mappings.
+            data_page_cache_size (int): the memory budget, in bytes, for caching parsed data pages.
+            intern_index_keys (bool): intern the parts of index keys across the repository.
+              this reduces memory when enumerating the entire index.
+            readahead (bool): when pages are read in sequence, read ahead in large runs in a background thread.
+              this speeds up scans of every page. it has no effect when memory mapped.
+            class_cache_size (int): the number of parsed class definitions and layouts to share
+              across the object resolvers of this repository, see `class_cache`.
+        """
         super(CIM, self).__init__()
         self.cim_type = cim_type
         self._directory = directory
-        self._mapping_class = MAPPING_TYPES[self.cim_type]
+        self._use_mmap = use_mmap
+        self._data_page_cache_size = data_page_cache_size
+        self._intern_index_keys = intern_index_keys
+        self._readahead = readahead
+        self._class_cache_size = class_cache_size
+        # the files held open between `open()` and `close()`
+        self._handles = None
         self._mapping_header_class = MAPPING_HEADER_TYPES[self.cim_type]
 
         # caches
@@ -941,21 +2875,130 @@ class CIM(object):
         return CIM_TYPE_WIN7
 
     @classmethod
-    def from_path(cls, path):
+    def from_path(cls, path, **kwargs):
+        """
+        open the repository in the given directory, detecting its type.
+
+        Args:
+            path (str): the directory containing the repository files.
+            **kwargs: options passed to the `CIM` constructor.
+
+        Returns:
+            CIM: the repository.
+        """
         cim_type = cls.guess_cim_type(path)
         logger.debug('auto-detected repository type: %s', cim_type)
-        return cls(cim_type, path)
+        return cls(cim_type, path, **kwargs)
+
+    def _get_created_stores(self):
+        # these are `cached_property`s, so only fetch what has been created.
+        for name in ("logical_data_store", "logical_index_store"):
+            store = self.__dict__.get(name)
+            if store is not None:
+                yield name, store
+
+    def _reset_stores(self):
+        for name, store in list(self._get_created_stores()):
+            del self.__dict__[name]
+            store.close()
+
+    @property
+    def is_open(self):
+        return self._handles is not None
+
+    def open(self):
+        """
+        hold the repository files open until `close()` is called.
+        while open, the logical stores read pages from the shared handles,
+          rather than opening the files for each page.
+        files that don't exist are skipped.
+        """
+        if self.is_open:
+            return
+
+        handles = FileHandlePool()
+        for fp in (self.data_file_path, self.index_file_path, self.current_mapping_file):
+            if os.path.exists(fp):
+                handles.open(fp)
+        self._handles = handles
+
+        # stores created before now may already be in use, such as by an `Index`,
+        #  so they're kept, and read through the handles, too.
+        for _, store in self._get_created_stores():
+            store.attach_handles(handles)
+
+    def close(self):
+        """
+        release any resources held open by the repository.
+        the logical stores are recreated on next access.
+        """
+        self._reset_stores()
+
+        if self._handles is not None:
+            self._handles.close()
+            self._handles = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @cached_property
+    def class_cache(self):
+        """
+        the parsed class definitions and layouts shared by all the object resolvers of this repository.
+        see `cim.objects.ObjectResolver`.
+
+        :rtype: LRUCache
+        """
+        return LRUCache(self._class_cache_size, sizeof=lambda c: 1)
+
+    @property
+    def directory(self):
+        """
+        the directory containing the repository files.
+
+        :rtype: str
+        """
+        return self._directory
+
+    @property
+    def use_mmap(self):
+        """
+        whether the repository files are memory mapped.
+
+        :rtype: bool
+        """
+        return self._use_mmap
 
     @property
-    def _data_file_path(self):
+    def data_file_path(self):
+        """
+        the path to the object store, OBJECTS.DATA.
+
+        :rtype: str
+        """
         return os.path.join(self._directory, "OBJECTS.DATA")
 
     @property
-    def _index_file_path(self):
+    def index_file_path(self):
+        """
+        the path to the index, INDEX.BTR.
+
+        :rtype: str
+        """
         return os.path.join(self._directory, "INDEX.BTR")
 
     @cached_property
-    def _current_mapping_file(self):
+    def current_mapping_file(self):
+        """
+        the path to the mapping file with the most recent version, MAPPING[1-3].MAP.
+
+        :rtype: str
+        """
         mapping_file_path = None
         max_version = 0
         for i in range(MAX_MAPPING_FILES):
@@ -981,17 +3024,21 @@ class CIM(object):
 
     @cached_property
     def mappings(self):
-        fp = self._current_mapping_file
-        dm = self._mapping_class()
-        im = self._mapping_class()
+        fp = self.current_mapping_file
 
-        if not os.path.exists(fp):
-            raise MissingMappingFileError()
+        if self._handles is not None and fp in self._handles:
+            buf = self._handles.read(fp, 0, os.path.getsize(fp))
+        else:
+            if not os.path.exists(fp):
+                raise MissingMappingFileError()
+
+            with open(fp, "rb") as f:
+                buf = f.read()
 
-        with open(fp, "rb") as f:
-            dm.vsParseFd(f)
-            im.vsParseFd(f)
-        return Mapping(dm), Mapping(im)
+        # the data mapping is followed immediately by the index mapping
+        dm = MappingTable(self.cim_type, buf)
+        im = MappingTable(self.cim_type, buf, offset=len(dm))
+        return Mapping(table=dm), Mapping(table=im)
 
     @property
     def data_mapping(self):
@@ -1005,8 +3052,14 @@ class CIM(object):
 
     @cached_property
     def logical_data_store(self):
-        return LogicalDataStore(self, self._data_file_path, self.data_mapping)
+        return LogicalDataStore(self, self.data_file_path, self.data_mapping,
+                                use_mmap=self._use_mmap, handles=self._handles,
+                                page_cache_size=self._data_page_cache_size,
+                                readahead=self._readahead)
 
     @cached_property
     def logical_index_store(self):
-        return LogicalIndexStore(self, self._index_file_path, self.index_mapping)
+        return LogicalIndexStore(self, self.index_file_path, self.index_mapping,
+                                 use_mmap=self._use_mmap, handles=self._handles,
+                                 intern_keys=self._intern_index_keys,
+                                 readahead=self._readahead)
@@ -19,7 +19,7 @@ def dump_definition(cd, cl):
     ret.append("properties:")
     for propname, prop in sorted(cd.properties.items(), key=lambda p: p[1].index):
         ret.append("  name: %s" % prop.name)
-        ret.append("    type: %s" % prop.type)
+        ret.append("    type: %s" % (prop.type,))
         ret.append("    index: %s" % prop.index)
         ret.append("    level: %s" % prop.level)
         ret.append("    offset: %s" % h(prop.offset))
@@ -61,7 +61,7 @@ def dump_layout(cd, cl):
     ret.append("properties:")
     for propname, prop in sorted(cl.properties.items(), key=lambda p: p[1].index):
         ret.append("  name: %s" % prop.name)
-        ret.append("    type: %s" % prop.type)
+        ret.append("    type: %s" % (prop.type,))
         ret.append("    index: %s" % prop.index)
         ret.append("    level: %s" % prop.level)
         ret.append("    offset: %s" % h(prop.offset))
@@ -7,6 +7,7 @@ from __future__ import absolute_import
 # BUGs:
 #   class instance: "root\\CIMV2" Microsoft_BDD_Info NS_68577372C66A7B20658487FBD959AA154EF54B5F935DCC5663E9228B44322805/CI_6FCB95E1CB11D0950DA7AE40A94D774F02DCD34701D9645E00AB9444DBCF640B/IL_EEC4121F2A07B61ABA16414812AA9AFC39AB0A136360A5ACE2240DC19B0464EB.1606.116085.3740
 
+import struct
 import hashlib
 import logging
 import traceback
@@ -14,6 +15,11 @@ import functools
 import contextlib
 from datetime import datetime
 from collections import namedtuple
+try:
+    from collections.abc import Mapping
+except ImportError:
+    # py2
+    from collections import Mapping
 
 from funcy.objects import cached_property
 import vstruct
@@ -28,6 +34,11 @@ ROOT_NAMESPACE_NAME = "root"
 SYSTEM_NAMESPACE_NAME = "__SystemClass"
 NAMESPACE_CLASS_NAME = "__namespace"
 
+# the number of hashed names, like `NS_<hash>`, to remember across all object resolvers, see `hash_name`.
+NAME_HASH_CACHE_SIZE = 0x4000
+# the separator between the key values in the name of an instance with a compound key, see `get_instance_name`.
+INSTANCE_NAME_KEY_SEPARATOR = u"\uffff"
+
 
 class FILETIME(vstruct.primitives.v_prim):
     _vs_builder = True
@@ -111,26 +122,6 @@ CIM_TYPES.CIM_TYPE_REFERENCE = 0x66
 CIM_TYPES.CIM_TYPE_DATETIME = 0x65
 
 
-CIM_TYPE_SIZES = {
-    CIM_TYPES.CIM_TYPE_INT16: 2,
-    CIM_TYPES.CIM_TYPE_INT32: 4,
-    CIM_TYPES.CIM_TYPE_REAL32: 4,
-    CIM_TYPES.CIM_TYPE_REAL64: 4,
-    CIM_TYPES.CIM_TYPE_STRING: 4,
-    CIM_TYPES.CIM_TYPE_BOOLEAN: 2,
-    CIM_TYPES.CIM_TYPE_UNKNOWN: 4,
-    CIM_TYPES.CIM_TYPE_INT8: 1,
-    CIM_TYPES.CIM_TYPE_UINT8: 1,
-    CIM_TYPES.CIM_TYPE_UINT16: 2,
-    CIM_TYPES.CIM_TYPE_UINT32: 4,
-    CIM_TYPES.CIM_TYPE_INT64: 8,
-    CIM_TYPES.CIM_TYPE_UINT64: 8,
-    # looks like: stringref to "\x00 00000000000030.000000:000"
-    CIM_TYPES.CIM_TYPE_DATETIME: 4,
-    CIM_TYPES.CIM_TYPE_REFERENCE: 4,
-}
-
-
 class BaseType(object):
     """
     this acts like a CimType, but its not backed by some bytes,
@@ -174,6 +165,59 @@ BOOLEAN_STATES.FALSE = 0x0
 BOOLEAN_STATES.TRUE = 0xFFFF
 
 
+# how to interpret the on-disk value of a type.
+DECODE_VALUE = 0  # the value itself
+DECODE_BOOLEAN = 1  # nonzero is True
+DECODE_STRING = 2  # the offset of a string in the data region
+DECODE_ARRAY = 3  # the offset of an array in the data region
+
+# how to parse and decode the on-disk value of a type.
+# `format` and `size` describe the value with `struct`, matching `value_parser`.
+# note: vstruct parses the signed integer types as unsigned, and so do these formats.
+CimTypeInfo = namedtuple("CimTypeInfo", ["format", "size", "value_parser", "decode"])
+
+CIM_TYPE_INFO = {
+    CIM_TYPES.CIM_TYPE_INT16: CimTypeInfo("H", 2, v_int16, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_INT32: CimTypeInfo("I", 4, v_int32, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_REAL32: CimTypeInfo("f", 4, v_float, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_REAL64: CimTypeInfo("d", 8, v_double, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_STRING: CimTypeInfo("I", 4, v_uint32, DECODE_STRING),
+    CIM_TYPES.CIM_TYPE_BOOLEAN: CimTypeInfo("H", 2, functools.partial(v_uint16, enum=BOOLEAN_STATES), DECODE_BOOLEAN),
+    CIM_TYPES.CIM_TYPE_UNKNOWN: CimTypeInfo("I", 4, v_uint32, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_INT8: CimTypeInfo("B", 1, v_int8, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_UINT8: CimTypeInfo("B", 1, v_uint8, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_UINT16: CimTypeInfo("H", 2, v_uint16, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_UINT32: CimTypeInfo("I", 4, v_uint32, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_INT64: CimTypeInfo("Q", 8, v_int64, DECODE_VALUE),
+    CIM_TYPES.CIM_TYPE_UINT64: CimTypeInfo("Q", 8, v_uint64, DECODE_VALUE),
+    # looks like: stringref to "\x00 00000000000030.000000:000"
+    CIM_TYPES.CIM_TYPE_DATETIME: CimTypeInfo("I", 4, v_uint32, DECODE_STRING),
+    CIM_TYPES.CIM_TYPE_REFERENCE: CimTypeInfo("I", 4, v_uint32, DECODE_STRING),
+}
+
+# arrays are stored as the offset of the array in the data region.
+ARRAY_TYPE_INFO = CimTypeInfo("I", 4, v_uint32, DECODE_ARRAY)
+
+CIM_TYPE_SIZES = {t: info.size for t, info in CIM_TYPE_INFO.items()}
+CIM_TYPE_FORMATS = {t: info.format for t, info in CIM_TYPE_INFO.items()}
+
+
+def get_type_info(type_):
+    """
+    get the description of the on-disk value of the given type.
+
+    Args:
+        type_ (int): the type code, from `CIM_TYPES`.
+
+    Returns:
+        CimTypeInfo: the description of the type.
+    """
+    try:
+        return CIM_TYPE_INFO[type_]
+    except KeyError:
+        raise RuntimeError("unknown type: %s" % (hex(type_)))
+
+
 class CimType(vstruct.VStruct):
     def __init__(self):
         vstruct.VStruct.__init__(self)
@@ -189,38 +233,7 @@ class CimType(vstruct.VStruct):
 
     @property
     def _base_value_parser(self):
-        if self.type == CIM_TYPES.CIM_TYPE_INT16:
-            return v_int16
-        if self.type == CIM_TYPES.CIM_TYPE_INT32:
-            return v_int32
-        elif self.type == CIM_TYPES.CIM_TYPE_REAL32:
-            return v_float
-        elif self.type == CIM_TYPES.CIM_TYPE_REAL64:
-            return v_double
-        elif self.type == CIM_TYPES.CIM_TYPE_STRING:
-            return v_uint32
-        elif self.type == CIM_TYPES.CIM_TYPE_BOOLEAN:
-            return functools.partial(v_uint16, enum=BOOLEAN_STATES)
-        elif self.type == CIM_TYPES.CIM_TYPE_INT8:
-            return v_int8
-        elif self.type == CIM_TYPES.CIM_TYPE_UINT8:
-            return v_uint8
-        elif self.type == CIM_TYPES.CIM_TYPE_UNKNOWN:
-            return v_uint32
-        elif self.type == CIM_TYPES.CIM_TYPE_UINT16:
-            return v_uint16
-        elif self.type == CIM_TYPES.CIM_TYPE_UINT32:
-            return v_uint32
-        elif self.type == CIM_TYPES.CIM_TYPE_INT64:
-            return v_int64
-        elif self.type == CIM_TYPES.CIM_TYPE_UINT64:
-            return v_uint64
-        elif self.type == CIM_TYPES.CIM_TYPE_DATETIME:
-            return v_uint32
-        elif self.type == CIM_TYPES.CIM_TYPE_REFERENCE:
-            return v_uint32
-        else:
-            raise RuntimeError("unknown type: %s" % (hex(self.type)))
+        return get_type_info(self.type).value_parser
 
     @property
     def value_parser(self):
@@ -229,6 +242,70 @@ class CimType(vstruct.VStruct):
         else:
             return self._base_value_parser
 
+    def __repr__(self):
+        return repr(self.value_type)
+
+    @property
+    def base_type_clone(self):
+        return get_value_type(self.type, False)
+
+    @property
+    def value_type(self):
+        """
+        get the immutable description of this type.
+
+        :rtype: ValueType
+        """
+        return get_value_type(self.type, self.is_array)
+
+
+class ValueType(object):
+    """
+    an immutable description of the type of a value, with the same interface as `CimType`.
+    the instances are shared, so fetch them using `get_value_type`.
+
+    this is not a tuple, so that it formats like `CimType`, such as via `"%s" % value_type`.
+    """
+    __slots__ = ("type", "is_array")
+
+    def __init__(self, type_, is_array):
+        self.type = type_
+        self.is_array = is_array
+
+    def __eq__(self, other):
+        if not isinstance(other, ValueType):
+            return NotImplemented
+        return self.type == other.type and self.is_array == other.is_array
+
+    def __ne__(self, other):
+        ret = self.__eq__(other)
+        if ret is NotImplemented:
+            return ret
+        return not ret
+
+    def __hash__(self):
+        return hash((self.type, self.is_array))
+
+    @property
+    def info(self):
+        """
+        get the description of the on-disk value.
+        arrays are references to the array in the data region.
+
+        :rtype: CimTypeInfo
+        """
+        if self.is_array:
+            return ARRAY_TYPE_INFO
+        return get_type_info(self.type)
+
+    @property
+    def value_parser(self):
+        return self.info.value_parser
+
+    @property
+    def base_type_clone(self):
+        return get_value_type(self.type, False)
+
     def __repr__(self):
         r = ""
         if self.is_array:
@@ -239,9 +316,29 @@ class CimType(vstruct.VStruct):
         r += typename
         return r
 
-    @property
-    def base_type_clone(self):
-        return BaseType(self.type, self._base_value_parser)
+
+# the shared type descriptors, by (type, is_array).
+_value_types = {}
+
+
+def get_value_type(type_, is_array=False):
+    """
+    get the shared, immutable description of the given type.
+
+    Args:
+        type_ (int): the type code, from `CIM_TYPES`.
+        is_array (bool): whether the value is an array of the type.
+
+    Returns:
+        ValueType: the type descriptor.
+    """
+    k = (type_, is_array)
+    try:
+        return _value_types[k]
+    except KeyError:
+        t = ValueType(type_, is_array)
+        _value_types[k] = t
+        return t
 
 
 class CimTypeArray(vstruct.VStruct):
@@ -345,17 +442,38 @@ class ClassDefinitionProperty(object):
     """
     this is the logical property object parsed from a standalone class definition.
     it is not aware of default values and inheritance behavior.
+
+    the name, type, and position of the property are decoded once, up front,
+      and the qualifiers are decoded on first access,
+      so repeated lookups (such as for instance keys) don't re-decode the class definition.
+    only the raw qualifier list is retained from the on-disk structure.
     """
+    __slots__ = ("_property_data", "_qualifier_list", "name", "type", "index", "offset", "level", "_qualifiers")
 
     def __init__(self, class_def, propref):
         super(ClassDefinitionProperty, self).__init__()
-        self._class_definition = class_def
-        self._propref = propref
+        # the data region that holds the qualifier keys and values.
+        self._property_data = class_def.property_data
 
         # this is the raw struct, without references/strings resolved
-        self._prop = _ClassDefinitionProperty()
-        property_offset = self._propref.offset_property_struct
-        self._prop.vsParse(self._class_definition.property_data.data, offset=property_offset)
+        prop = _ClassDefinitionProperty()
+        prop.vsParse(self._property_data.data, offset=propref.offset_property_struct)
+
+        if propref.is_builtin_property:
+            self.name = propref.builtin_property_name
+        else:
+            self.name = self._property_data.get_string(propref.offset_property_name)
+
+        # :type: ValueType
+        self.type = prop.type.value_type
+        self.index = prop.index
+        self.offset = prop.offset
+        self.level = prop.level
+
+        # :type: QualifiersList
+        self._qualifier_list = prop.qualifiers
+        # decoded on first access.
+        self._qualifiers = None
 
     def __repr__(self):
         return "Property(name: {:s}, type: {:s}, qualifiers: {:s})".format(
@@ -363,41 +481,27 @@ class ClassDefinitionProperty(object):
             CIM_TYPES.vsReverseMapping(self.type.type),
             ",".join("%s=%s" % (k, str(v)) for k, v in self.qualifiers.items()))
 
-    @property
-    def name(self):
-        if self._propref.is_builtin_property:
-            return self._propref.builtin_property_name
-        else:
-            return self._class_definition.property_data.get_string(self._propref.offset_property_name)
-
-    @property
-    def type(self):
-        return self._prop.type
-
-    @property
-    def index(self):
-        return self._prop.index
-
-    @property
-    def offset(self):
-        return self._prop.offset
-
-    @property
-    def level(self):
-        return self._prop.level
-
     @property
     def qualifiers(self):
         """ get dict of str to str """
+        if self._qualifiers is not None:
+            return self._qualifiers
+
         ret = {}
-        for i in range(self._prop.qualifiers.count):
-            q = self._prop.qualifiers.qualifiers[i]
-            # TODO: don't reach
-            qk = self._class_definition.property_data.get_qualifier_key(q)
-            qv = self._class_definition.property_data.get_qualifier_value(q)
+        for i in range(self._qualifier_list.count):
+            q = self._qualifier_list.qualifiers[i]
+            qk = self._property_data.get_qualifier_key(q)
+            qv = self._property_data.get_qualifier_value(q)
             ret[str(qk)] = qv
+        self._qualifiers = ret
         return ret
 
+    @property
+    def is_key(self):
+        """ :rtype: bool """
+        # TODO: don't hardcode BUILTIN_QUALIFIERS.PROP_KEY symbol name
+        return self.qualifiers.get("PROP_QUALIFIER_KEY") is True
+
 
 class PropertyReference(vstruct.VStruct):
     def __init__(self):
@@ -525,37 +629,63 @@ class DataRegion(vstruct.VStruct):
 
         self._size = v_uint32()
         self.data = v_bytes(size=0)
+        # map from offset to decoded string.
+        # :type: Dict[int, str]
+        self._strings = {}
 
     def pcb__size(self):
         self["data"].vsSetLength(self.size)
+        # the region is being (re)parsed, so forget any strings decoded from old data.
+        self._strings = {}
 
     @property
     def size(self):
         return self._size & 0x7FFFFFFF
 
-    def pcb_size(self):
-        self["data"].vsSetLength(self.size)
-
     def get_string(self, ref):
-        s = WMIString()
-        s.vsParse(self.data, offset=int(ref))
-        return s.s
+        """
+        get the string at the given offset into the region.
+        strings are memoized by offset, since many values refer to the same string.
+
+        the layout matches `WMIString`: a zero byte, then a NULL-terminated UTF-8 string.
+        """
+        ref = int(ref)
+        try:
+            return self._strings[ref]
+        except KeyError:
+            pass
 
-    def get_array(self, ref, item_type):
-        Parser = item_type.value_parser
         data = self.data
+        if ref >= len(data):
+            raise RuntimeError("string offset out of range: " + hex(ref))
+
+        # skip the leading zero byte
+        start = ref + 1
+        end = data.find(b"\x00", start)
+        if end == -1:
+            raise RuntimeError("string has no NULL terminator: " + hex(ref))
 
-        array_size = v_uint32()
-        array_size.vsParse(data, offset=int(ref))
+        s = data[start:end].decode("utf-8", errors="replace")
+        self._strings[ref] = s
+        return s
 
-        items = []
-        offset = ref + 4  # sizeof(array_size:uint32_t)
-        for i in range(array_size):
-            p = Parser()
-            p.vsParse(data, offset=offset)
-            items.append(self.get_value(p, item_type))
-            offset += len(p)
-        return items
+    def get_array(self, ref, item_type):
+        """
+        get the array at the given offset into the region: a uint32 count, then the items.
+        the items are fixed size, so they're unpacked all at once.
+        """
+        data = self.data
+        offset = int(ref)
+        count, = struct.unpack_from("<I", data, offset)
+        values = struct.unpack_from("<%d%s" % (count, get_value_format(item_type)), data, offset + 4)
+
+        decode = get_type_info(item_type.type).decode
+        if decode == DECODE_STRING:
+            return [self.get_string(v) for v in values]
+        elif decode == DECODE_BOOLEAN:
+            return [v != 0 for v in values]
+        else:
+            return list(values)
 
     def get_value(self, value, value_type):
         """
@@ -565,23 +695,18 @@ class DataRegion(vstruct.VStruct):
         if value_type.is_array:
             return self.get_array(value, value_type.base_type_clone)
 
-        t = value_type.type
-        if t == CIM_TYPES.CIM_TYPE_STRING:
-            return self.get_string(value)
-        if t == CIM_TYPES.CIM_TYPE_REFERENCE:
-            return self.get_string(value)
-        elif t == CIM_TYPES.CIM_TYPE_BOOLEAN:
-            return value != 0
-        elif t == CIM_TYPES.CIM_TYPE_DATETIME:
+        decode = get_type_info(value_type.type).decode
+        if decode == DECODE_STRING:
             return self.get_string(value)
-        elif CIM_TYPES.vsReverseMapping(t):
+        elif decode == DECODE_BOOLEAN:
+            # the value may be a vstruct primitive, which doesn't compare by value.
+            return int(value) != 0
+        else:
             # TODO: why are we getting mixed vstruct/Python types?
             if hasattr(value, "vsGetValue"):
                 return value.vsGetValue()
             else:
                 return value
-        else:
-            raise RuntimeError("unknown type: %s" % (str(value_type)))
 
     def get_qualifier_value(self, qualifier):
         return self.get_value(qualifier.value, qualifier.value_type)
@@ -611,22 +736,17 @@ class ClassDefinition(vstruct.VStruct):
     def __repr__(self):
         return "ClassDefinition(name: {:s})".format(self.class_name)
 
-    @property
+    @cached_property
     def keys(self):
         """
-        get names of Key properties for instances
+        get names of Key properties for instances.
+        this is computed once per class definition.
 
-        :rtype: str
+        :rtype: List[str]
         """
-        ret = []
-        for propname, prop in self.properties.items():
-            for k, v in prop.qualifiers.items():
-                # TODO: don't hardcode BUILTIN_QUALIFIERS.PROP_KEY symbol name
-                if k == "PROP_QUALIFIER_KEY" and v is True:
-                    ret.append(propname)
-        return ret
+        return [propname for propname, prop in self.properties.items() if prop.is_key]
 
-    @property
+    @cached_property
     def class_name(self):
         """ :rtype: str """
         return self.property_data.get_string(self.header.offset_class_name)
@@ -846,10 +966,10 @@ class ClassInstance(vstruct.VStruct):
         self.unk0 = v_uint8()
         self.property_state = PropertyStates(InstancePropertyState, len(self.class_layout.properties))
 
-        self.toc = vstruct.VArray()
-        for prop in sorted(self.class_layout.properties.values(), key=lambda p: p.index):
-            P = prop.type.value_parser
-            self.toc.vsAddElement(P())
+        # the raw property values, ordered by property index.
+        # these are decoded in bulk by the `InstanceDecoder` of the class layout.
+        self._decoder = self.class_layout.instance_decoder
+        self.toc = v_bytes(size=self._decoder.toc_length)
 
         self.qualifiers_list = QualifiersList()
         self.dynprops = Dynprops()
@@ -878,18 +998,8 @@ class ClassInstance(vstruct.VStruct):
 
     @cached_property
     def properties(self):
-        """ get dict of str to concrete Property values"""
-        ret = {}
-        for prop in self.class_layout.properties.values():
-            state = self.property_state.get_by_index(prop.index)
-            v = None
-            if state.is_initialized:
-                if state.use_default_value:
-                    v = prop.default_value
-                else:
-                    v = self.data.get_value(self.toc[prop.index], prop.type)
-            ret[prop.name] = ClassInstanceProperty(prop, self, state, v)
-        return ret
+        """ get dict of str to concrete Property values, decoded on first access """
+        return InstanceProperties(self)
 
     def get_property(self, name):
         return self.properties[name]
@@ -902,6 +1012,67 @@ class ClassInstance(vstruct.VStruct):
         return ret
 
 
+class InstanceProperties(Mapping):
+    """
+    the properties of a class instance, by property name.
+
+    each property is decoded on first access, and then cached,
+     so fetching a few properties, such as the instance key, doesn't decode the others.
+    iterates in the order of `ClassLayout.properties`.
+    """
+
+    def __init__(self, class_instance):
+        """
+        :type class_instance: ClassInstance
+        """
+        super(InstanceProperties, self).__init__()
+        self._instance = class_instance
+        self._decoder = class_instance.class_layout.instance_decoder
+        # the raw property values, ordered by property index, unpacked on first access.
+        self._values = None
+        # :type: Dict[str, ClassInstanceProperty]
+        self._properties = {}
+
+    def _decode(self, name):
+        prop, rule, item_type = self._decoder.plan_by_name[name]
+        instance = self._instance
+        state = instance.property_state.get_by_index(prop.index)
+        v = None
+        if state.is_initialized:
+            if state.use_default_value:
+                v = prop.default_value
+            else:
+                if self._values is None:
+                    self._values = self._decoder.unpack_toc(instance.toc)
+                v = self._decoder.decode_value(instance.data, self._values[prop.index], rule, item_type)
+        return ClassInstanceProperty(prop, instance, state, v)
+
+    def __getitem__(self, name):
+        try:
+            return self._properties[name]
+        except KeyError:
+            pass
+
+        # raises KeyError for unknown property names
+        p = self._decode(name)
+        self._properties[name] = p
+        return p
+
+    def __contains__(self, name):
+        return name in self._decoder.plan_by_name
+
+    def __iter__(self):
+        return iter(self._decoder.names)
+
+    def __len__(self):
+        return len(self._decoder.names)
+
+    @property
+    def decoded_count(self):
+        """ the number of properties decoded so far. """
+        return len(self._properties)
+
+
 class CoreClassInstance(vstruct.VStruct):
     """
     begins with DWORD:0x0 and has no hash field
@@ -1044,21 +1215,121 @@ class ClassLayoutProperty(object):
             raise RuntimeError("unable to find ancestor class with default value")
 
 
+def get_value_format(value_type):
+    """
+    get the struct format of the on-disk value of the given type.
+
+    Args:
+        value_type (CimType): the type of the value.
+
+    Returns:
+        str: the struct format character.
+    """
+    if value_type.is_array:
+        return ARRAY_TYPE_INFO.format
+    return get_type_info(value_type.type).format
+
+
+class InstanceDecoder(object):
+    """
+    decodes the property values of the instances of a class.
+    this is compiled once per class layout, and shared by all its instances.
+
+    the values of an instance are stored in a table ordered by property index,
+      which is unpacked with a single precompiled `struct.Struct`.
+    then, strings, references, datetimes, and arrays are dereferenced into the instance data region.
+    the values are the same as from `DataRegion.get_value`.
+    """
+
+    # how to interpret the raw value of a property.
+    DECODE_VALUE = DECODE_VALUE
+    DECODE_BOOLEAN = DECODE_BOOLEAN
+    DECODE_STRING = DECODE_STRING
+    DECODE_ARRAY = DECODE_ARRAY
+
+    def __init__(self, class_layout):
+        """
+        :type class_layout: ClassLayout
+        """
+        super(InstanceDecoder, self).__init__()
+        props = sorted(class_layout.properties.values(), key=lambda p: p.index)
+        self.toc_struct = struct.Struct("<" + "".join(get_value_format(prop.type) for prop in props))
+        self.toc_length = self.toc_struct.size
+
+        # the decode plan, in the order of `ClassLayout.properties`.
+        # :type: List[Tuple[ClassLayoutProperty, int, ValueType]]
+        self.plan = []
+        # the property names, in the order of the plan.
+        self.names = []
+        # map from property name to its entry in the plan.
+        # :type: Dict[str, Tuple[ClassLayoutProperty, int, ValueType]]
+        self.plan_by_name = {}
+        for name, prop in class_layout.properties.items():
+            value_type = prop.type
+            item_type = None
+            if value_type.is_array:
+                rule = self.DECODE_ARRAY
+                item_type = value_type.base_type_clone
+            else:
+                rule = get_type_info(value_type.type).decode
+            step = (prop, rule, item_type)
+            self.plan.append(step)
+            self.names.append(name)
+            self.plan_by_name[name] = step
+
+    def unpack_toc(self, buf):
+        """
+        Args:
+            buf (bytes): the raw property values of an instance.
+
+        Returns:
+            Tuple[Union[int, float]]: the raw property values, ordered by property index.
+        """
+        return self.toc_struct.unpack_from(buf)
+
+    def decode_value(self, data, value, rule, item_type):
+        """
+        Args:
+            data (DataRegion): the data region of the instance.
+            value (Union[int, float]): the raw property value.
+            rule (int): the decode rule of the property, from the plan.
+            item_type (ValueType): the type of the items of an array property, from the plan.
+
+        Returns:
+            variant: the property value.
+        """
+        if rule == self.DECODE_STRING:
+            return data.get_string(value)
+        elif rule == self.DECODE_BOOLEAN:
+            return value != 0
+        elif rule == self.DECODE_ARRAY:
+            return data.get_array(value, item_type)
+        else:
+            return value
+
+
 class QueryError(ValueError):
     pass
 
 
 class ClassLayout(object):
-    def __init__(self, object_resolver, namespace, class_definition):
+    def __init__(self, object_resolver, namespace, class_definition, super_class_layout=None):
         """
+        the ancestors of the class are either provided up front, via `super_class_layout`,
+          or resolved on demand via the object resolver.
+        a layout that is shared across resolvers should be given its ancestors and no resolver,
+          so that it doesn't keep a resolver alive, or resolve its ancestors via another resolver's index.
+
         :type object_resolver: ObjectResolver
         :type namespace: str
         :type class_definition: ClassDefinition
+        :type super_class_layout: ClassLayout
         """
         super(ClassLayout, self).__init__()
         self.object_resolver = object_resolver
         self.namespace = namespace
         self.class_definition = class_definition
+        self._super_class_layout = super_class_layout
 
     def __repr__(self):
         return "ClassLayout(name: {:s})".format(self.class_definition.class_name)
@@ -1071,13 +1342,16 @@ class ClassLayout(object):
         derivation = []
 
         cl = self
-        super_class_name = self.class_definition.super_class_name
-
-        while super_class_name != "":
+        while True:
             derivation.append(cl)
-            cl = self.object_resolver.get_cl(self.namespace, super_class_name)
             super_class_name = cl.class_definition.super_class_name
-        derivation.append(cl)
+            if super_class_name == "":
+                break
+
+            if cl._super_class_layout is not None:
+                cl = cl._super_class_layout
+            else:
+                cl = cl.object_resolver.get_cl(cl.namespace, super_class_name)
         derivation.reverse()
         return derivation
 
@@ -1099,6 +1373,11 @@ class ClassLayout(object):
                 props[prop.index] = ClassLayoutProperty(prop, self)
         return {prop.name: prop for prop in props.values()}
 
+    @cached_property
+    def instance_decoder(self):
+        """ :rtype: InstanceDecoder """
+        return InstanceDecoder(self)
+
     @cached_property
     def properties_length(self):
         off = 0
@@ -1110,6 +1389,167 @@ class ClassLayout(object):
         return off
 
 
+def _get_key_value_name(value):
+    if value is None or isinstance(value, (bool, list)):
+        return None
+    elif not hasattr(value, "upper"):
+        # numbers are named by their decimal representation.
+        return str(value)
+    else:
+        return value
+
+
+def get_instance_name(class_definition, instance_key):
+    """
+    get the name of an instance, as hashed into the `IL_` part of its index key.
+
+    an instance of a class with a single key property is named by the value of that property,
+      like `__EventFilter.Name="SCM Event Log Filter"` is named `SCM Event Log Filter`.
+    an instance of a class with a compound key is named by the values of its key properties,
+      ordered by property name, case insensitive, and joined by `INSTANCE_NAME_KEY_SEPARATOR` (U+FFFF),
+      like WMI builds the key string of an instance.
+      so, a `__FilterToConsumerBinding` is named by its `Consumer` reference, U+FFFF, and then its `Filter` reference.
+    the name is hashed like other names (upper case UTF-16LE), see `hash_name`.
+
+    the naming of instances without keys (singletons), or keyed by booleans or arrays, is not known,
+      so these return None, and are found by scanning the instances of the class instead.
+
+    Args:
+        class_definition (ClassDefinition): the class of the instance.
+        instance_key (InstanceKey): the key of the instance.
+
+    Returns:
+        str: the instance name, or None if it can't be computed.
+    """
+    keys = class_definition.keys
+    if len(keys) == 0:
+        return None
+
+    names = []
+    for key in sorted(keys, key=lambda k: k.upper()):
+        name = _get_key_value_name(instance_key[key])
+        if name is None:
+            return None
+        names.append(name)
+    return INSTANCE_NAME_KEY_SEPARATOR.join(names)
+
+
+class InstanceLookupStats(object):
+    """
+    counters that describe how instances are found by key, see `ObjectResolver.get_ci`.
+    """
+
+    def __init__(self):
+        super(InstanceLookupStats, self).__init__()
+        # the number of instances found with a single exact index lookup.
+        self.hits = 0
+        # the number of lookups that fell back to scanning all the instances of the class.
+        self.misses = 0
+
+    def __repr__(self):
+        return "InstanceLookupStats(hits=%d, misses=%d)" % (self.hits, self.misses)
+
+
+def new_hash(cim_type):
+    """
+    create a hash object of the algorithm used by the given repository type for its index keys.
+
+    Args:
+        cim_type (str): the repository type, one of `cim.CIM_TYPE_XP` or `cim.CIM_TYPE_WIN7`.
+
+    Returns:
+        hashlib hash object: MD5 for XP, and SHA-256 for Win7.
+    """
+    if cim_type == cim.CIM_TYPE_XP:
+        return hashlib.md5()
+    elif cim_type == cim.CIM_TYPE_WIN7:
+        return hashlib.sha256()
+    else:
+        raise RuntimeError("Unexpected CIM type: {:s}".format(str(cim_type)))
+
+
+# map from (cim type, prefix, name) to the hashed name, like `NS_<hash>`.
+# this is cleared when it fills, rather than evicting the least recently used names,
+#  so that lookups are plain dict operations.
+_name_hashes = {}
+
+
+def _hash_data(cim_type, data):
+    m = new_hash(cim_type)
+    m.update(data)
+    return m.hexdigest().upper()
+
+
+def _hash_name(cim_type, name, prefix):
+    return prefix + _hash_data(cim_type, name.upper().encode("UTF-16LE"))
+
+
+def _remember_name_hash(k, h):
+    if len(_name_hashes) >= NAME_HASH_CACHE_SIZE:
+        _name_hashes.clear()
+    _name_hashes[k] = h
+
+
+def hash_name(cim_type, name, prefix=""):
+    """
+    hash the given name, as it appears in index keys.
+    names are case insensitive, and are hashed as upper case UTF-16LE.
+    results are memoized, since walks of the repository hash the same few names many times.
+
+    Args:
+        cim_type (str): the repository type, one of `cim.CIM_TYPE_XP` or `cim.CIM_TYPE_WIN7`.
+        name (str): the name to hash.
+        prefix (str): the key part prefix to prepend to the hash, like `NS_`.
+
+    Returns:
+        str: the prefixed, upper case hex hash.
+    """
+    k = (cim_type, prefix, name)
+    h = _name_hashes.get(k)
+    if h is None:
+        h = _hash_name(cim_type, name, prefix)
+        _remember_name_hash(k, h)
+    return h
+
+
+def hash_data(cim_type, data):
+    """
+    hash the given raw bytes, like an already encoded name, with the algorithm of the repository type.
+    results are memoized along with the names from `hash_name`.
+
+    Args:
+        cim_type (str): the repository type, one of `cim.CIM_TYPE_XP` or `cim.CIM_TYPE_WIN7`.
+        data (bytes): the bytes to hash.
+
+    Returns:
+        str: the upper case hex hash.
+    """
+    # raw bytes have no prefix, so they're not confused with names on python 2.
+    k = (cim_type, None, data)
+    h = _name_hashes.get(k)
+    if h is None:
+        h = _hash_data(cim_type, data)
+        _remember_name_hash(k, h)
+    return h
+
+
+def hash_names(cim_type, names, prefix=""):
+    """
+    hash many names at once, such as to build a table from hashes back to names.
+    unlike `hash_name`, the results are not memoized,
+      so hashing a large list of names doesn't displace the names that walks of the repository use.
+
+    Args:
+        cim_type (str): the repository type, one of `cim.CIM_TYPE_XP` or `cim.CIM_TYPE_WIN7`.
+        names (Iterable[str]): the names to hash.
+        prefix (str): the key part prefix to prepend to each hash, like `NS_`.
+
+    Returns:
+        List[str]: the prefixed, upper case hex hashes, in the order of the names.
+    """
+    return [_hash_name(cim_type, name, prefix) for name in names]
+
+
 class ObjectResolver(object):
     def __init__(self, repo, index=None):
         """
@@ -1125,28 +1565,39 @@ class ObjectResolver(object):
         else:
             self._index = index
 
-        self._cdcache = {}  # :type: Mapping[str, ClassDefinition]
-        self._clcache = {}  # :type: Mapping[str, ClassLayout]
+        # these are in front of the class cache shared by all resolvers of the repository, `CIM.class_cache`.
+        self._cdcache = {}  # :type: Mapping[str, Tuple[Hashable, ClassDefinition]]
+        self._clcache = {}  # :type: Mapping[str, Tuple[Hashable, ClassLayout]]
 
-        # until we can correctly compute instance key hashes, maintain a cache mapping
-        #   from encountered keys (serialized) to the instance hashes
-        self._ihashcache = {}  # :type: dict[str,str]
+        # instance key hashes can't always be computed (see `get_instance_name`),
+        #   so maintain a cache mapping from encountered class ids and keys (serialized) to the instance hashes
+        self._ihashcache = {}  # :type: dict[Tuple[str,str],str]
+        # how often instances are found by their key hash, rather than by scanning the class.
+        self.instance_lookup_stats = InstanceLookupStats()
 
     def hash(self, s):
-        if self._repo.cim_type == cim.CIM_TYPE_XP:
-            h = hashlib.md5()
-        elif self._repo.cim_type == cim.CIM_TYPE_WIN7:
-            h = hashlib.sha256()
-        else:
-            raise RuntimeError("Unexpected CIM type: {:s}".format(str(self._repo.cim_type)))
-        h.update(s)
-        return h.hexdigest().upper()
+        """ hash the given raw bytes, see `hash_data`. """
+        return hash_data(self._repo.cim_type, s)
+
+    def hash_names(self, names, prefix=""):
+        """
+        hash many names at once, such as to build a table from hashes back to names.
+        the results are not memoized, see `hash_names`.
+
+        Args:
+            names (Iterable[str]): the names to hash.
+            prefix (str): the key part prefix to prepend to each hash, like `NS_`.
+
+        Returns:
+            List[str]: the prefixed, upper case hex hashes, in the order of the names.
+        """
+        return hash_names(self._repo.cim_type, names, prefix=prefix)
 
     def _build(self, prefix, name=None):
         if name is None:
             return prefix
         else:
-            return prefix + self.hash(name.upper().encode("UTF-16LE"))
+            return hash_name(self._repo.cim_type, name, prefix=prefix)
 
     def NS(self, name=None):
         return self._build("NS_", name)
@@ -1175,23 +1626,32 @@ class ObjectResolver(object):
         return self._build("I_", name)
 
     def get_object(self, query):
-        """ fetch the first object buffer matching the query """
+        """ fetch the object buffer for the key that exactly matches the query """
         logger.debug("query: %s", str(query))
-        refs = self._index.lookup_keys(query)
-        if not refs:
+        ref = self._index.get(query)
+        if ref is None:
             raise QueryError('not found: ' + str(query))
-        if refs and len(refs) > 1:
-            raise QueryError('too many results: ' + str(query))
-        ref = refs[0]
         return self._repo.logical_data_store.get_object_buffer(ref)
 
     def get_keys(self, query):
         """ return a generator of keys matching the query """
         return self._index.lookup_keys(query)
 
-    def get_objects(self, query):
-        """ return a generator of object buffers matching the query """
-        for ref in self.get_keys(query):
+    def get_objects(self, query, ordered=True):
+        """
+        return a generator of object buffers matching the query.
+
+        when not `ordered`, the objects are fetched in the order they're stored, rather than in key order.
+        this is faster when fetching many objects, though the first object is only available after
+          the entire query completes.
+        """
+        if not ordered:
+            keys = list(self._index.iter_prefix(query))
+            for ref, buf in self._repo.logical_data_store.get_object_buffers(keys, skip_missing=True):
+                yield ref, buf
+            return
+
+        for ref in self._index.iter_prefix(query):
             try:
                 yield ref, self._repo.logical_data_store.get_object_buffer(ref)
             except cim.IndexKeyNotFoundError:
@@ -1202,109 +1662,188 @@ class ObjectResolver(object):
     def root_namespace(self):
         return SYSTEM_NAMESPACE_NAME
 
-    def get_cd_buf(self, namespace_name, class_name):
+    def _get_cd_ref(self, namespace_name, class_name):
         q = cim.Key("{}/{}".format(
             self.NS(namespace_name),
             self.CD(class_name)))
 
-        refs = self._index.lookup_keys(q)
-
-        if refs is None:
+        ref = self._index.get(q)
+        if ref is None:
             # some standard class definitions (like __NAMESPACE) are not in the
             #   current NS, but in the __SystemClass NS. So we try that one, too.
             logger.debug("didn't find %s in %s, retrying in %s", class_name, namespace_name, SYSTEM_NAMESPACE_NAME)
             q = cim.Key("{}/{}".format(
                 self.NS(SYSTEM_NAMESPACE_NAME),
                 self.CD(class_name)))
-        elif refs and len(refs) > 1:
-            raise QueryError('to many results: ' + str(q))
+            ref = self._index.get(q)
+            if ref is None:
+                raise QueryError('not found: ' + str(q))
 
-        return self.get_object(q)
+        return ref
 
-    def get_cd(self, namespace_name, class_name):
+    def get_cd_buf(self, namespace_name, class_name):
+        return self._repo.logical_data_store.get_object_buffer(self._get_cd_ref(namespace_name, class_name))
+
+    def _get_cd_entry(self, namespace_name, class_name):
+        """
+        fetch the class definition, and its key in the shared class cache.
+
+        class definitions are shared by the location of their data in the object store,
+          so a definition that is found by many resolvers, or via many namespaces
+          (such as those that fall back to __SystemClass), is fetched and parsed once per repository.
+
+        note: sharing only works within one physical record.
+        identical definitions stored in separate records, such as a class defined in two namespaces,
+          are parsed once each.
+        the `CD_` hash of the class name can't be the key instead,
+          since unrelated classes in different namespaces may have the same name.
+
+        Returns:
+            Tuple[Hashable, ClassDefinition]: the class cache key and the class definition.
+        """
         c_id = get_class_id(namespace_name, class_name)
-        c_cd = self._cdcache.get(c_id, None)
+        entry = self._cdcache.get(c_id, None)
+        if entry is not None:
+            return entry
+
+        ref = self._get_cd_ref(namespace_name, class_name)
+        cache_key = ("CD", ref.data_page, ref.data_id, ref.data_length)
+
+        class_cache = self._repo.class_cache
+        c_cd = class_cache.get(cache_key)
         if c_cd is None:
             logger.debug("cdcache miss")
+            c_cd = ClassDefinition()
+            c_cd.vsParse(self._repo.logical_data_store.get_object_buffer(ref))
+            class_cache.put(cache_key, c_cd)
 
-            q = cim.Key("{}/{}".format(
-                self.NS(namespace_name),
-                self.CD(class_name)))
+        entry = (cache_key, c_cd)
+        self._cdcache[c_id] = entry
+        return entry
 
-            refs = self._index.lookup_keys(q)
-            if refs and len(refs) > 1:
-                raise QueryError('too many results: ' + str(q))
-            elif not refs:
-                # some standard class definitions (like __NAMESPACE) are not in the
-                #   current NS, but in the __SystemClass NS. So we try that one, too.
-                logger.debug("didn't find %s in %s, retrying in %s", class_name, namespace_name, SYSTEM_NAMESPACE_NAME)
-                q = cim.Key("{}/{}".format(
-                    self.NS(SYSTEM_NAMESPACE_NAME),
-                    self.CD(class_name)))
-
-            c_cdbuf = self.get_object(q)
-            c_cd = ClassDefinition()
-            c_cd.vsParse(c_cdbuf)
-            self._cdcache[c_id] = c_cd
-        return c_cd
+    def get_cd(self, namespace_name, class_name):
+        return self._get_cd_entry(namespace_name, class_name)[1]
 
-    def get_cl(self, namespace_name, class_name):
+    def _get_cl_entry(self, namespace_name, class_name):
+        """
+        fetch the class layout, and its key in the shared class cache.
+
+        the layout depends upon the ancestors of the class, which this resolver finds via its index.
+        so, the ancestors are resolved here, up front, and the layout is shared by the definitions
+          of the class and all its ancestors.
+        the shared layout doesn't reference this resolver.
+        like the definitions, layouts are shared only within a namespace and one physical definition record,
+          see `_get_cd_entry`.
+
+        Returns:
+            Tuple[Hashable, ClassLayout]: the class cache key and the class layout.
+        """
         c_id = get_class_id(namespace_name, class_name)
-        c_cl = self._clcache.get(c_id, None)
+        entry = self._clcache.get(c_id, None)
+        if entry is not None:
+            return entry
+
+        cd_key, c_cd = self._get_cd_entry(namespace_name, class_name)
+
+        super_key = None
+        super_cl = None
+        if c_cd.super_class_name != "":
+            super_key, super_cl = self._get_cl_entry(namespace_name, c_cd.super_class_name)
 
-        if not c_cl:
+        cache_key = ("CL", self.NS(namespace_name), cd_key, super_key)
+        class_cache = self._repo.class_cache
+        c_cl = class_cache.get(cache_key)
+        if c_cl is None:
             logger.debug("clcache miss")
-            c_cd = self.get_cd(namespace_name, class_name)
-            c_cl = ClassLayout(self, namespace_name, c_cd)
-            self._clcache[c_id] = c_cl
+            c_cl = ClassLayout(None, namespace_name, c_cd, super_class_layout=super_cl)
+            class_cache.put(cache_key, c_cl)
 
-        return c_cl
+        entry = (cache_key, c_cl)
+        self._clcache[c_id] = entry
+        return entry
 
-    def get_ci(self, namespace_name, class_name, instance_key):
-        # TODO: this is a major hack! we should build the hash, but the data to hash
-        #    has not been described correctly..
+    def get_cl(self, namespace_name, class_name):
+        return self._get_cl_entry(namespace_name, class_name)[1]
 
-        # CI or KI?
-        q = cim.Key("{}/{}/{}".format(
-            self.NS(namespace_name),
-            self.CI(class_name),
-            self.IL(known_hash=self._ihashcache.get(str(instance_key), ""))))
+    @property
+    def class_cache_stats(self):
+        """
+        the effectiveness of the class cache shared by all resolvers of the repository.
 
-        cl = self.get_cl(namespace_name, class_name)
-        for _, buf in self.get_objects(q):
-            instance = self.parse_instance(self.get_cl(namespace_name, class_name), buf)
-            this_is_it = True
-            for k in cl.class_definition.keys:
-                if instance.get_property(k).value != instance_key[k]:
-                    this_is_it = False
-                    break
+        :rtype: cim.CacheStats
+        """
+        return self._repo.class_cache.stats
 
-            if this_is_it:
-                return instance
+    @staticmethod
+    def _is_instance(cl, instance, instance_key):
+        for k in cl.class_definition.keys:
+            if instance.get_property(k).value != instance_key[k]:
+                return False
+        return True
 
-        raise IndexError("Key not found: " + str(instance_key))
+    def _find_ci(self, namespace_name, class_name, instance_key):
+        """
+        find the instance of the given class with the given key.
 
-    def get_ci_buf(self, namespace_name, class_name, instance_key):
-        # TODO: this is a major hack!
+        this tries a single exact index lookup of the `IL_` key part computed from the instance key,
+          see `get_instance_name`.
+        when the key part can't be computed, or the lookup misses,
+          this falls back to scanning all the instances of the class,
+          and counts the miss in `instance_lookup_stats`.
+
+        Returns:
+            Tuple[bytes, ClassInstance]: the instance buffer, and the parsed instance.
+
+        Raises:
+            IndexError: if the instance is not found.
+        """
+        cl = self.get_cl(namespace_name, class_name)
 
         # CI or KI?
-        q = cim.Key("{}/{}/{}".format(
+        prefix = "{}/{}".format(
             self.NS(namespace_name),
-            self.CI(class_name),
-            self.IL(known_hash=self._ihashcache.get(str(instance_key), ""))))
+            self.CI(class_name))
 
-        cl = self.get_cl(namespace_name, class_name)
-        for _, buf in self.get_objects(q):
-            instance = self.parse_instance(self.get_cl(namespace_name, class_name), buf)
-            this_is_it = True
-            for k in cl.class_definition.keys:
-                if not instance.get_property(k).value == instance_key[k]:
-                    this_is_it = False
-                    break
-            if this_is_it:
-                return buf
-
-        raise IndexError("Key not found: " + instance_key)
+        c_id = get_class_id(namespace_name, class_name)
+        known_hash = self._ihashcache.get((c_id, str(instance_key)))
+        if known_hash is not None:
+            il = self.IL(known_hash=known_hash)
+        else:
+            name = get_instance_name(cl.class_definition, instance_key)
+            il = self.IL(name) if name is not None else None
+
+        if il is not None:
+            ref = self._index.get(cim.Key(prefix + "/" + il))
+            if ref is not None:
+                try:
+                    buf = self._repo.logical_data_store.get_object_buffer(ref)
+                except cim.IndexKeyNotFoundError:
+                    # like `get_objects`, tolerate index entries whose objects are missing,
+                    #  and look for the instance among the others.
+                    logger.warning("Expected object not found in object store: %s", ref)
+                else:
+                    instance = self.parse_instance(cl, buf)
+                    if self._is_instance(cl, instance, instance_key):
+                        self.instance_lookup_stats.hits += 1
+                        return buf, instance
+
+        self.instance_lookup_stats.misses += 1
+        logger.debug("instance key hash missed, scanning instances of %s: %s", class_name, str(instance_key))
+
+        q = cim.Key(prefix + "/" + self.IL())
+        for ref, buf in self.get_objects(q):
+            instance = self.parse_instance(cl, buf)
+            if self._is_instance(cl, instance, instance_key):
+                self._ihashcache[(c_id, str(instance_key))] = ref.get_part_hash("IL_")
+                return buf, instance
+
+        raise IndexError("Key not found: " + str(instance_key))
+
+    def get_ci(self, namespace_name, class_name, instance_key):
+        return self._find_ci(namespace_name, class_name, instance_key)[1]
+
+    def get_ci_buf(self, namespace_name, class_name, instance_key):
+        return self._find_ci(namespace_name, class_name, instance_key)[0]
 
     @property
     def ns_cd(self):
@@ -1367,8 +1906,9 @@ class ObjectResolver(object):
                 logger.error(traceback.format_exc())
                 continue
 
-            # str(instance.key) is sorted k-v pairs, should be unique
-            self._ihashcache[str(instance.key)] = ref.get_part_hash("IL_")
+            # str(instance.key) is sorted k-v pairs, should be unique within the class
+            c_id = get_class_id(namespace_name, class_name)
+            self._ihashcache[(c_id, str(instance.key))] = ref.get_part_hash("IL_")
             yield self.ClassInstanceSpecifier(namespace_name, class_name, instance.key)
 
 
@@ -28,16 +28,16 @@ def extract_data_page_slack(page):
     slack = intervaltree.IntervalTree([intervaltree.Interval(0, cim.DATA_PAGE_SIZE)])
 
     # remove the toc region
-    slack.chop(0, len(page.toc))
+    slack.chop(0, page.toc_length)
 
     # if there is a toc, then we remove the empty entry at the end
     # (this is not included in the list of entries, but its part of the toc).
-    if len(page.toc) > 0:
-        slack.chop(len(page.toc), len(page.toc) + 0x10)
+    if page.toc_length > 0:
+        slack.chop(page.toc_length, page.toc_length + 0x10)
 
     # and regions for each of the entries
-    for j in range(page.toc.count):
-        entry = page.toc[j]
+    for j in range(page.toc_count):
+        entry = page.get_toc_entry(j)
         slack.chop(entry.offset, entry.offset + entry.size)
 
     for region in sorted(slack):
@@ -58,6 +58,5 @@ def find_unallocated_pages(repo):
     Yields:
         int: the physical page number of an unallocated page.
     '''
-    for i in range(repo.logical_data_store.page_count):
-        if not repo.data_mapping.is_physical_page_mapped(i):
-            yield i
+    for i in repo.data_mapping.get_unmapped_physical_pages(repo.logical_data_store.page_count):
+        yield i
@@ -0,0 +1,252 @@
+"""
+a persistent, on-disk index of all the keys in a CIM repository.
+
+walking INDEX.BTR is slow for large repositories, so this builds a SQLite database
+ that holds every key, along with its decoded data reference, and reuses it
+ until the repository files change.
+"""
+import os
+import json
+import errno
+import logging
+import sqlite3
+import tempfile
+
+import cim
+
+
+logger = logging.getLogger(__name__)
+
+
+# bump this when the layout of the database changes, to invalidate existing sidecars.
+SIDECAR_FORMAT_VERSION = 1
+
+
+def get_repo_signature(repo):
+    """
+    describe the state of the repository files, so that changes to the repository can be detected.
+
+    Args:
+        repo (cim.CIM): the repository.
+
+    Returns:
+        str: a description of the repository files that changes when they do.
+    """
+    files = {}
+    for fp in (repo.data_file_path, repo.index_file_path, repo.current_mapping_file):
+        st = os.stat(fp)
+        files[os.path.basename(fp)] = [st.st_size, st.st_mtime]
+
+    return json.dumps({
+        'format': SIDECAR_FORMAT_VERSION,
+        'cim_type': repo.cim_type,
+        'mapping_version': repo.data_mapping.header.version,
+        'files': files,
+    }, sort_keys=True)
+
+
+def _iter_key_rows(repo):
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    for key in index.iter_prefix(cim.Key('')):
+        if key.is_data_reference:
+            yield str(key), key.data_page, key.data_id, key.data_length
+        else:
+            yield str(key), None, None, None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+def _replace(src, dst):
+    # os.replace atomically replaces an existing file, even on Windows, but is python 3 only.
+    # on python 2, os.rename does the same everywhere but Windows.
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        os.rename(src, dst)
+
+
+def build_sidecar(repo, path):
+    """
+    walk the index of the given repository and write all its keys to a new sidecar database.
+    the database is written to a temporary file and then moved into place,
+     so a reader never sees a partial sidecar.
+
+    Args:
+        repo (cim.CIM): the repository.
+        path (str): the path to the sidecar database.
+
+    Returns:
+        None
+    """
+    signature = get_repo_signature(repo)
+
+    # a uniquely named file alongside the sidecar, so that concurrent builders don't collide,
+    #  and so that the file can be renamed over the sidecar on the same file system.
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', prefix=os.path.basename(path) + '.',
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+
+    try:
+        db = sqlite3.connect(tmp_path)
+        try:
+            db.execute('CREATE TABLE meta (signature TEXT NOT NULL)')
+            db.execute('CREATE TABLE keys (key TEXT PRIMARY KEY, data_page INTEGER, data_id INTEGER, data_length INTEGER)')
+            # the index yields keys in order, so they're appended to the primary key index.
+            db.executemany('INSERT OR IGNORE INTO keys VALUES (?, ?, ?, ?)', _iter_key_rows(repo))
+            db.execute('CREATE INDEX keys_data_page ON keys (data_page)')
+            db.execute('INSERT INTO meta VALUES (?)', (signature, ))
+            db.commit()
+        finally:
+            db.close()
+
+        _replace(tmp_path, path)
+    except Exception:
+        _remove(tmp_path)
+        raise
+
+    logger.debug('built key sidecar: %s', path)
+
+
+def get_sidecar_signature(path):
+    """
+    fetch the repository signature recorded in the given sidecar database.
+
+    Args:
+        path (str): the path to the sidecar database.
+
+    Returns:
+        str: the signature, or None if the file is missing or is not a sidecar.
+    """
+    if not os.path.exists(path):
+        return None
+
+    db = sqlite3.connect(path)
+    try:
+        row = db.execute('SELECT signature FROM meta').fetchone()
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        db.close()
+
+    if row is None:
+        return None
+    return row[0]
+
+
+class KeySidecar(object):
+    """
+    a persistent table of all the keys in a repository, queried without touching INDEX.BTR.
+
+    use `KeySidecar.open` to (re)build the sidecar as necessary.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): the path to an existing sidecar database.
+        """
+        super(KeySidecar, self).__init__()
+        self.path = path
+        self._db = sqlite3.connect(path)
+
+    @classmethod
+    def open(cls, repo, path):
+        """
+        open the sidecar for the given repository, building it if it is missing,
+         or if the repository has changed since it was built.
+
+        Args:
+            repo (cim.CIM): the repository.
+            path (str): the path to the sidecar database.
+
+        Returns:
+            KeySidecar: the sidecar.
+        """
+        if get_sidecar_signature(path) != get_repo_signature(repo):
+            logger.debug('key sidecar is missing or stale: %s', path)
+            build_sidecar(repo, path)
+        return cls(path)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM keys').fetchone()[0]
+
+    def iter_prefix(self, key):
+        """
+        query the keys that start with the given prefix, in order.
+
+        Args:
+            key (cim.Key): the key prefix.
+
+        Yields:
+            cim.Key: the matching keys.
+        """
+        prefix = str(key)
+        # the keys with the prefix are contiguous, starting at the prefix itself.
+        for k, in self._db.execute('SELECT key FROM keys WHERE key >= ? ORDER BY key', (prefix, )):
+            if not k.startswith(prefix):
+                break
+            yield cim.Key(str(k))
+
+    def lookup_prefix(self, key):
+        """
+        query the keys that start with the given prefix.
+
+        Args:
+            key (cim.Key): the key prefix.
+
+        Returns:
+            List[cim.Key]: the matching keys, in order.
+        """
+        return list(self.iter_prefix(key))
+
+    def get(self, key):
+        """
+        fetch the key that is exactly the given key,
+          or the given key followed by a data reference, like `Index.get`.
+
+        Args:
+            key (cim.Key): the key to find.
+
+        Returns:
+            cim.Key: the matching key, or None if the key is not in the repository.
+        """
+        skey = str(key)
+        row = self._db.execute('SELECT key FROM keys WHERE key = ?', (skey, )).fetchone()
+        if row is not None:
+            return cim.Key(str(row[0]))
+
+        sref = skey + '.'
+        row = self._db.execute('SELECT key FROM keys WHERE key >= ? ORDER BY key LIMIT 1', (sref, )).fetchone()
+        if row is not None and row[0].startswith(sref):
+            return cim.Key(str(row[0]))
+
+        return None
+
+    def iter_page_references(self, logical_page_number):
+        """
+        query the keys that refer to objects on the given logical data page.
+
+        Args:
+            logical_page_number (int): the logical data page number.
+
+        Yields:
+            cim.Key: the keys that refer to the page, in order.
+        """
+        for k, in self._db.execute('SELECT key FROM keys WHERE data_page = ? ORDER BY key', (logical_page_number, )):
+            yield cim.Key(str(k))
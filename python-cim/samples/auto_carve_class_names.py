@@ -164,10 +164,10 @@ def main(argv=None):
         logging.basicConfig(level=logging.INFO)
         logging.getLogger().setLevel(logging.INFO)
 
-    repo = cim.CIM.from_path(args.input)
+    repo = cim.CIM.from_path(args.input, readahead=True)
 
     carves = []
-    for i in range(repo.data_mapping.map.header.mapping_entry_count):
+    for i in range(repo.data_mapping.mapping_entry_count):
         try:
             page = repo.logical_data_store.get_page(i)
         except cim.UnmappedPage:
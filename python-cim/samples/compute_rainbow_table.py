@@ -51,17 +51,12 @@ def build_rainbow_table(repo):
 
     rainbow_table = {}
 
-    for namespace in namespaces:
-        thehash = resolver.NS(namespace.name).partition('_')[2]
-        rainbow_table[thehash] = namespace.name
+    names = [namespace.name for namespace in namespaces]
+    names.extend(klass.name for klass in classes)
+    names.extend(str(instance.instance_key) for instance in instances)
 
-    for klass in classes:
-        thehash = resolver.CD(klass.name).partition('_')[2]
-        rainbow_table[thehash] = klass.name
-
-    for instance in instances:
-        thehash = resolver.CI(str(instance.instance_key)).partition('_')[2]
-        rainbow_table[thehash] = str(instance.instance_key)
+    for thehash, name in zip(resolver.hash_names(names), names):
+        rainbow_table[thehash] = name
 
     return rainbow_table
 
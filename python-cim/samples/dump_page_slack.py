@@ -58,7 +58,7 @@ def main(argv=None):
         logging.basicConfig(level=logging.INFO)
         logging.getLogger().setLevel(logging.INFO)
 
-    repo = cim.CIM.from_path(args.input)
+    repo = cim.CIM.from_path(args.input, readahead=True)
 
     for buf in extract_data_page_slack(repo):
         os.write(sys.stdout.fileno(), buf)
@@ -41,7 +41,7 @@ def main(argv=None):
         logging.basicConfig(level=logging.INFO)
         logging.getLogger().setLevel(logging.INFO)
 
-    repo = cim.CIM.from_path(args.input)
+    repo = cim.CIM.from_path(args.input, readahead=True)
     for pnum in cim.recovery.find_unallocated_pages(repo):
         logger.info('found unallocated physical page: 0x%x', pnum)
         os.write(sys.stdout.fileno(), repo.logical_data_store.get_physical_page_buffer(pnum))
@@ -60,7 +60,7 @@ def find_bytes(repo, needle):
                 offset_found = True
 
                 key_hits = set([])
-                for key in index.lookup_keys(cim.Key('NS_')):
+                for key in index.iter_keys(cim.Key('NS_')):
                     if not key.is_data_reference:
                         continue
 
@@ -104,7 +104,7 @@ def main(argv=None):
         logging.basicConfig(level=logging.INFO)
         logging.getLogger().setLevel(logging.INFO)
 
-    repo = cim.CIM.from_path(args.input)
+    repo = cim.CIM.from_path(args.input, readahead=True)
     try:
         needle = binascii.unhexlify(args.needle)
         find_bytes(repo, needle)
@@ -76,7 +76,7 @@ class PhysicalDataPagesItem(Item):
     @cached_property
     def children(self):
         return [PhysicalDataPageItem(self._ctx, i) for i in
-                range(self._ctx.cim.data_mapping.map.header.physical_page_count)]
+                range(self._ctx.cim.data_mapping.physical_page_count)]
 
     @property
     def type(self):
@@ -137,7 +137,7 @@ class LogicalDataPagesItem(Item):
     @cached_property
     def children(self):
         return [LogicalDataPageItem(self._ctx, i) for i in
-                range(self._ctx.cim.data_mapping.map.header.mapping_entry_count)]
+                range(self._ctx.cim.data_mapping.mapping_entry_count)]
 
     @property
     def type(self):
@@ -254,7 +254,7 @@ class LogicalIndexPagesItem(Item):
     @cached_property
     def children(self):
         return [LogicalIndexPageItem(self._ctx, i) for i in
-                range(self._ctx.cim.index_mapping.map.header.mapping_entry_count)]
+                range(self._ctx.cim.index_mapping.mapping_entry_count)]
 
     @property
     def type(self):
@@ -96,3 +96,208 @@ def test_find_unreferenced_objects(repo):
                                     (0x676, 0x1cc77, 0x274),
                                     (0x677, 0x1c273, 0x240),
                                     (0x677, 0x194dc, 0x240)]
+
+
+def test_bounded_index_cache(repo):
+    """
+    demonstrate that a small index page cache evicts pages,
+      yet the index returns the same results.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    expected = list(map(str, index.lookup_keys(cim.Key('NS_'))))
+
+    for cache in (cim.LRUCache(0x10, sizeof=lambda page: 1),
+                  cim.ClockCache(0x10, sizeof=lambda page: 1)):
+        index = cim.Index(repo.cim_type, repo.logical_index_store, cache=cache, pinned_levels=2)
+        assert list(map(str, index.lookup_keys(cim.Key('NS_')))) == expected
+
+        stats = index.cache_stats
+        assert stats.count <= 0x10
+        assert stats.evictions > 0
+        # the root page, at least, is pinned
+        assert index._index_store.pinned_page_count >= 1
+
+
+def test_fast_index_pages(repo):
+    """
+    demonstrate that the bulk decoded index pages match the vstruct index pages.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    store = repo.logical_index_store
+    for i in range(repo.index_mapping.mapping_entry_count):
+        if not repo.index_mapping.is_logical_page_mapped(i):
+            continue
+
+        page = store.get_page(i)
+        fast_page = store.get_fast_page(i)
+
+        assert fast_page.is_valid == page.is_valid
+        if not page.is_valid:
+            continue
+
+        assert fast_page.key_count == page.key_count
+        for j in range(page.key_count):
+            assert str(fast_page.get_key(j)) == str(page.get_key(j))
+        for j in range(page.key_count + 1):
+            assert fast_page.get_child(j) == page.get_child(j)
+
+
+def test_interned_index_keys(repopath):
+    """
+    demonstrate that interning the index keys doesn't change the results of queries,
+    and that the repeated key parts are shared across pages.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    repo = cim.CIM(cim.CIM_TYPE_WIN7, repopath)
+    irepo = cim.CIM(cim.CIM_TYPE_WIN7, repopath, intern_index_keys=True)
+
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    iindex = cim.Index(irepo.cim_type, irepo.logical_index_store)
+
+    keys = list(map(str, index.lookup_keys(cim.Key('NS_'))))
+    assert list(map(str, iindex.lookup_keys(cim.Key('NS_')))) == keys
+
+    # the interned pages are searched by part ids, which must agree with the string order of the keys.
+    for key in keys[::0x10]:
+        bare_key = key.partition('.')[0]
+        for prefix in (key, bare_key, bare_key + '/', bare_key[:-1], key[:len(key) // 2]):
+            assert list(map(str, iindex.lookup_prefix(cim.Key(prefix)))) == \
+                   list(map(str, index.lookup_prefix(cim.Key(prefix))))
+        assert str(iindex.get(cim.Key(bare_key))) == str(index.get(cim.Key(bare_key)))
+
+    # there are far fewer distinct parts than parts across all keys.
+    parts = irepo.logical_index_store.key_parts
+    assert len(parts) < sum(len(key.split('/')) for key in set(keys))
+
+    page = irepo.logical_index_store.get_fast_page(irepo.logical_index_store.root_page_number)
+    for i in range(page.key_count):
+        assert '/'.join(parts[j] for j in page.get_key_ids(i)) == str(page.get_key(i))
+
+
+def test_bounded_key_interner(repo):
+    """
+    demonstrate that the key interner refuses new strings once full,
+    and that pages decoded with a full interner still provide their keys.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    interner = cim.StringInterner(max_size=2)
+    assert interner.intern('a') == 0
+    assert interner.intern('b') == 1
+    assert interner.intern('c') is None
+    assert interner.intern('a') == 0
+    assert len(interner) == 2
+
+    store = repo.logical_index_store
+    pnum = store.root_page_number
+    page = store.get_fast_page(pnum)
+    buf = store.get_logical_page_buffer(pnum)
+    fpage = cim.FastIndexPage(buf, pnum, page.physical_page_number, interner=cim.StringInterner(max_size=1))
+    with pytest.raises(RuntimeError):
+        fpage.get_key_ids(0)
+    for i in range(page.key_count):
+        assert str(fpage.get_key(i)) == str(page.get_key(i))
+
+
+def test_iter_keys(repo):
+    """
+    demonstrate that streaming the index keys yields the same keys as the list query,
+    and that the stream can be stopped early.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    keys = index.lookup_keys(cim.Key('NS_'))
+    assert list(map(str, index.iter_keys(cim.Key('NS_')))) == list(map(str, keys))
+
+    first = next(index.iter_keys(cim.Key('NS_')))
+    assert str(first) == str(keys[0])
+
+
+def test_prefix_query(repo):
+    """
+    demonstrate that the prefix query finds each key with the prefix exactly once,
+    while visiting fewer pages for narrower queries.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+
+    expected = sorted(set(map(str, index.lookup_keys(cim.Key('NS_')))))
+    keys = list(map(str, index.lookup_prefix(cim.Key('NS_'))))
+    assert keys == expected
+    all_pages = index.last_query_stats.pages_visited
+    assert index.last_query_stats.matches == len(keys)
+
+    prefix = keys[len(keys) // 2].partition('/')[0] + '/CD_'
+    assert list(map(str, index.lookup_prefix(cim.Key(prefix)))) == [k for k in keys if k.startswith(prefix)]
+    assert index.last_query_stats.pages_visited < all_pages
+
+    assert index.lookup_prefix(cim.Key('CD_')) == []
+
+
+def test_point_lookup(repo):
+    """
+    demonstrate that the point lookup finds keys by their full string, or without their data reference.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    for key in index.lookup_prefix(cim.Key('NS_')):
+        assert str(index.get(key)) == str(key)
+
+        if key.is_data_reference:
+            ref = index.get(cim.Key(str(key).partition('.')[0]))
+            assert ref.is_data_reference
+            assert str(ref).partition('.')[0] == str(key).partition('.')[0]
+
+    assert index.get(cim.Key('NS_')) is None
+
+
+def test_parallel_prefix_query(repo):
+    """
+    demonstrate that walking the index in worker processes finds the same keys as walking it here.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    keys = list(map(str, index.lookup_prefix(cim.Key('NS_'))))
+
+    assert list(map(str, index.iter_prefix_parallel(cim.Key('NS_'), repo, processes=2))) == keys
+    assert sorted(map(str, index.iter_prefix_parallel(cim.Key('NS_'), repo, processes=2, ordered=False))) == keys
@@ -115,3 +115,250 @@ def test_toc_entry_id_conflicts(repo):
             ids[entry.record_id] += 1
 
     assert ids.most_common(1)[0][1] > 0
+
+
+def test_mmap_data_pages(repopath):
+    """
+    demonstrate that memory mapped data pages match the pages read from disk.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    repo = cim.CIM(cim.CIM_TYPE_WIN7, repopath)
+    with cim.CIM(cim.CIM_TYPE_WIN7, repopath, use_mmap=True) as mrepo:
+        datapages = repo.logical_data_store
+        mdatapages = mrepo.logical_data_store
+
+        assert mdatapages.page_count == datapages.page_count
+
+        for i in range(datapages.page_count):
+            assert bytes(mdatapages.get_physical_page_buffer(i)) == datapages.get_physical_page_buffer(i)
+
+        for i in range(repo.data_mapping.map.header.mapping_entry_count):
+            if not repo.data_mapping.is_logical_page_mapped(i):
+                continue
+
+            page = datapages.get_page(i)
+            mpage = mdatapages.get_page(i)
+            assert mpage.toc.count == page.toc.count
+            for j in range(page.toc.count):
+                assert bytes(mpage.objects[j].buffer) == page.objects[j].buffer
+
+
+def test_closed_mmap_data_pages(repopath):
+    """
+    demonstrate that reading a memory mapped page after the repo is closed
+      raises a clear error.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    with cim.CIM(cim.CIM_TYPE_WIN7, repopath, use_mmap=True) as mrepo:
+        mdatapages = mrepo.logical_data_store
+        mdatapages.get_physical_page_buffer(0)
+
+    with pytest.raises(cim.RepositoryClosedError):
+        mdatapages.get_physical_page_buffer(0)
+
+
+def test_open_repo_pages(repopath):
+    """
+    demonstrate that pages read through the handles of an open repo
+      match the pages read by reopening the files.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    repo = cim.CIM(cim.CIM_TYPE_WIN7, repopath)
+    with cim.CIM(cim.CIM_TYPE_WIN7, repopath) as orepo:
+        assert orepo.is_open
+
+        for i in range(repo.logical_data_store.page_count):
+            assert orepo.logical_data_store.get_physical_page_buffer(i) == \
+                   repo.logical_data_store.get_physical_page_buffer(i)
+
+        for i in range(repo.logical_index_store.page_count):
+            assert orepo.logical_index_store.get_physical_page_buffer(i) == \
+                   repo.logical_index_store.get_physical_page_buffer(i)
+
+    assert not orepo.is_open
+
+
+def test_open_repo_existing_stores(repopath):
+    """
+    demonstrate that opening a repo keeps the stores already in use,
+      and reads their pages through the handles.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    repo = cim.CIM(cim.CIM_TYPE_WIN7, repopath)
+    indexpages = repo.logical_index_store
+    datapages = repo.logical_data_store
+    index = cim.Index(repo.cim_type, indexpages)
+    keys = [key for key in index.lookup_prefix(cim.Key('NS_')) if key.is_data_reference]
+    bufs = [datapages.get_object_buffer(key) for key in keys]
+
+    with repo:
+        assert repo.logical_index_store is indexpages
+        assert repo.logical_data_store is datapages
+
+        assert [key for key in index.lookup_prefix(cim.Key('NS_')) if key.is_data_reference] == keys
+        datapages.page_cache.clear()
+        assert [datapages.get_object_buffer(key) for key in keys] == bufs
+
+    # the stores are recreated once the repo is closed.
+    assert repo.logical_data_store is not datapages
+
+
+def test_data_page_cache(repopath):
+    """
+    demonstrate that parsed data pages are cached within the memory budget.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    repo = cim.CIM(cim.CIM_TYPE_WIN7, repopath, data_page_cache_size=4 * cim.DATA_PAGE_SIZE)
+    datapages = repo.logical_data_store
+
+    page = datapages.get_page(0x0)
+    assert datapages.get_page(0x0) is page
+    assert datapages.page_cache.stats.hits == 1
+    assert datapages.page_cache.stats.misses == 1
+
+    for i in range(repo.data_mapping.mapping_entry_count):
+        if not repo.data_mapping.is_logical_page_mapped(i):
+            continue
+        datapages.get_page(i)
+
+    stats = datapages.page_cache.stats
+    assert stats.evictions > 0
+    assert stats.size <= stats.max_size
+
+
+def test_fast_toc(repo):
+    """
+    demonstrate that the compact TOC matches the vstruct TOC.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    datapages = repo.logical_data_store
+
+    for i in range(repo.data_mapping.mapping_entry_count):
+        if not repo.data_mapping.is_logical_page_mapped(i):
+            continue
+
+        page = datapages.get_page(i)
+        assert page.toc_count == page.toc.count
+        assert page.toc_length == len(page.toc)
+        for j in range(page.toc.count):
+            entry = page.toc[j]
+            assert page.get_toc_entry(j) == (entry.record_id, entry.offset, entry.size, entry.CRC)
+
+
+def test_object_buffers(repo):
+    """
+    demonstrate that fetching objects in bulk yields the same buffers as fetching them one at a time,
+    visiting the pages in physical order.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    keys = [key for key in index.lookup_prefix(cim.Key('NS_')) if key.is_data_reference]
+
+    physical_page_numbers = []
+    count = 0
+    for key, buf in repo.logical_data_store.get_object_buffers(keys):
+        assert isinstance(buf, (bytes, bytearray))
+        assert buf == repo.logical_data_store.get_object_buffer(key)
+        physical_page_numbers.append(repo.data_mapping.get_physical_page_number(key.data_page))
+        count += 1
+
+    assert count == len(keys)
+    assert physical_page_numbers == sorted(physical_page_numbers)
+
+
+def test_spanning_object_buffers(repopath):
+    """
+    demonstrate that objects that span pages are assembled the same way from each page source.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    repo = cim.CIM(cim.CIM_TYPE_WIN7, repopath)
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    keys = [key for key in index.lookup_prefix(cim.Key('NS_'))
+            if key.is_data_reference and key.data_length > cim.DATA_PAGE_SIZE]
+    assert len(keys) > 0
+
+    with cim.CIM(cim.CIM_TYPE_WIN7, repopath) as orepo:
+        with cim.CIM(cim.CIM_TYPE_WIN7, repopath, use_mmap=True) as mrepo:
+            for key in keys:
+                buf = repo.logical_data_store.get_object_buffer(key)
+                # the pages are assembled into one buffer, without a further copy.
+                assert isinstance(buf, bytearray)
+                assert len(buf) == key.data_length
+                assert orepo.logical_data_store.get_object_buffer(key) == buf
+                assert mrepo.logical_data_store.get_object_buffer(key) == buf
+
+
+def test_readahead_pages(repopath):
+    """
+    demonstrate that reading ahead doesn't change the contents of pages,
+    whether they're read in sequence or not.
+
+    Args:
+        repopath (str): the path to the deleted-instance repo
+
+    Returns:
+        None
+    """
+    repo = cim.CIM(cim.CIM_TYPE_WIN7, repopath)
+    rrepo = cim.CIM(cim.CIM_TYPE_WIN7, repopath, readahead=True)
+
+    store = repo.logical_data_store
+    rstore = rrepo.logical_data_store
+    page_numbers = list(range(store.page_count)) + list(reversed(range(store.page_count)))
+    for i in page_numbers:
+        assert rstore.get_physical_page_buffer(i) == store.get_physical_page_buffer(i)
+
+    store = repo.logical_index_store
+    rstore = rrepo.logical_index_store
+    for i in range(store.page_count):
+        assert rstore.get_physical_page_buffer(i) == store.get_physical_page_buffer(i)
+
+    # pages read in logical order are read ahead in logical order, too.
+    for store, rstore, mapping in ((repo.logical_data_store, rrepo.logical_data_store, repo.data_mapping),
+                                   (repo.logical_index_store, rrepo.logical_index_store, repo.index_mapping)):
+        for i in range(mapping.mapping_entry_count):
+            if not mapping.is_logical_page_mapped(i):
+                continue
+            assert rstore.get_logical_page_buffer(i) == store.get_logical_page_buffer(i)
+
+    rrepo.close()
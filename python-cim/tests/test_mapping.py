@@ -25,6 +25,43 @@ def test_mapping_type_guess_win7():
     assert cim.CIM.guess_cim_type(repopath) == cim.CIM_TYPE_WIN7
 
 
+def test_mapping_table():
+    '''
+    demonstrate that the bulk decoded mapping tables match the vstruct parser.
+    '''
+    repodir = os.path.join(os.path.dirname(__file__), 'repos')
+    win7dir = os.path.join(repodir, 'win7')
+    repopath = os.path.join(win7dir, 'deleted-instance')
+
+    for i in range(cim.MAX_MAPPING_FILES):
+        with open(os.path.join(repopath, 'MAPPING{:d}.MAP'.format(i + 1)), 'rb') as f:
+            buf = f.read()
+            f.seek(0)
+
+            data_map = cim.MappingWin7()
+            data_map.vsParseFd(f)
+            index_map = cim.MappingWin7()
+            index_map.vsParseFd(f)
+
+        data_table = cim.MappingTable(cim.CIM_TYPE_WIN7, buf)
+        index_table = cim.MappingTable(cim.CIM_TYPE_WIN7, buf, offset=len(data_table))
+
+        for table, map in ((data_table, data_map), (index_table, index_map)):
+            assert table.mapping_entry_count == map.header.mapping_entry_count
+            assert table.free_dword_count == map.free_dword_count
+            assert table.footer_signature == map.footer_signature
+            assert list(table.page_numbers) == [map.entries[j].page_number
+                                                for j in range(map.header.mapping_entry_count)]
+            assert table.get_entry(0).used_space == map.entries[0].used_space
+
+            # the mapping may still be constructed from the raw structure.
+            mapping = cim.Mapping(map)
+            assert mapping.map is map
+            assert list(mapping._table.page_numbers) == list(table.page_numbers)
+            assert mapping.get_physical_page_number(logical_page_number=0) == \
+                cim.Mapping(table=table).get_physical_page_number(logical_page_number=0)
+
+
 ############ INDEX MAPPING ###############################################
 
 
@@ -225,3 +262,23 @@ def test_unmapped_data_logical_pages(repo):
     assert unmapped_pages == [91, 160, 201, 202, 203, 204, 205, 206, 207, 208,
                               209, 210, 211, 212, 213, 214, 215, 227, 228, 230]
 
+
+def test_bulk_mapping_queries(repo):
+    """
+    demonstrate that the bulk mapping queries agree with the per-page queries.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    for mapping in (repo.data_mapping, repo.index_mapping):
+        assert list(mapping.get_mapped_logical_pages()) == \
+               [i for i in range(mapping.mapping_entry_count) if mapping.is_logical_page_mapped(i)]
+
+        assert list(mapping.get_unmapped_physical_pages()) == \
+               [i for i in range(mapping.physical_page_count) if not mapping.is_physical_page_mapped(i)]
+
+    # collected empirically.
+    assert list(repo.index_mapping.get_unmapped_physical_pages())[:8] == [4, 8, 40, 48, 62, 70, 74, 84]
@@ -1,5 +1,8 @@
+import struct
+
 import cim
 import cim.objects
+import cim.formatters
 from fixtures import *
 
 
@@ -232,6 +235,26 @@ def test_class_layouts(classes):
     assert len(properties) == 53867
 
 
+def test_formatters(classes):
+    """
+    format all class definitions and layouts from the repository.
+    demonstrates the value types of the properties format like the raw types.
+
+    Args:
+        classes (List[cim.objects.TreeClassDefinition]): the list of classes found in the win7/deleted-instance repo.
+
+    Returns:
+        None
+    """
+    for klass in classes:
+        definition = cim.formatters.dump_definition(klass.cd, klass.cl)
+        layout = cim.formatters.dump_layout(klass.cd, klass.cl)
+
+        for prop in klass.cd.properties.values():
+            assert ("    type: %s" % str(prop.type)) in definition
+            assert ("    type: %s" % str(prop.type)) in layout
+
+
 def test_class_instances(classes):
     """
     parse all class instances from all class definitions in the repository.
@@ -269,3 +292,323 @@ def test_class_instances(classes):
     assert len(qualifiers) == 12
     assert len(properties) == 8237
     assert len(propqualifiers) == 20117
+
+
+def test_value_sizes():
+    """
+    demonstrate the table of value sizes agrees with the vstruct value parsers.
+
+    Returns:
+        None
+    """
+    for t, size in cim.objects.CIM_TYPE_SIZES.items():
+        ct = cim.objects.CimType()
+        ct.vsParse(struct.pack('<BBBB', t, 0x0, 0, 0))
+        assert len(ct.value_parser()) == size
+
+
+def test_boolean_values():
+    """
+    demonstrate boolean values decode by value, both as vstruct primitives and within arrays.
+
+    Returns:
+        None
+    """
+    data = struct.pack('<IHHH', 3, 0x0, 0x1, 0xFFFF)
+    region = cim.objects.DataRegion()
+    region.vsParse(struct.pack('<I', 0x80000000 | len(data)) + data)
+
+    boolean = cim.objects.BaseType(cim.objects.CIM_TYPES.CIM_TYPE_BOOLEAN, cim.objects.v_uint16)
+    assert region.get_value(cim.objects.v_uint16(0x0), boolean) is False
+    assert region.get_value(cim.objects.v_uint16(0xFFFF), boolean) is True
+    assert region.get_array(0x0, boolean) == [False, True, True]
+
+
+def test_instance_decoder(classes):
+    """
+    decode the property values of all class instances with the precompiled decoder,
+     and compare them against the generic `DataRegion.get_value`.
+
+    Args:
+        classes (List[cim.objects.TreeClassDefinition]): the list of classes found in the win7/deleted-instance repo.
+
+    Returns:
+        None
+    """
+    count = 0
+    for klass in classes:
+        layout = klass.cl
+        decoder = layout.instance_decoder
+        assert decoder.toc_length == layout.properties_length
+
+        for instance in klass.instances:
+            values = decoder.unpack_toc(instance.ci.toc)
+            for prop, rule, item_type in decoder.plan:
+                state = instance.ci.property_state.get_by_index(prop.index)
+                if not state.is_initialized or state.use_default_value:
+                    continue
+                expected = instance.ci.data.get_value(values[prop.index], prop.type)
+                assert decoder.decode_value(instance.ci.data, values[prop.index], rule, item_type) == expected
+                count += 1
+
+    assert count > 0
+
+
+def test_lazy_instance_properties(classes):
+    """
+    demonstrate that fetching the key of a class instance decodes only the key properties.
+
+    Args:
+        classes (List[cim.objects.TreeClassDefinition]): the list of classes found in the win7/deleted-instance repo.
+
+    Returns:
+        None
+    """
+    for klass in classes:
+        for instance in klass.instances:
+            ci = instance.ci
+            if not isinstance(ci, cim.objects.ClassInstance):
+                continue
+
+            keys = set(ci.class_layout.class_definition.keys)
+            key = ci.key
+            assert ci.properties.decoded_count == len(keys)
+
+            # decoding the remaining properties doesn't change the key properties
+            assert len(dict(ci.properties.items())) == len(ci.class_layout.properties)
+            assert ci.properties.decoded_count == len(ci.class_layout.properties)
+            for k in keys:
+                assert ci.properties[k].value == key[k]
+
+
+def test_data_region():
+    """
+    decode strings and arrays from a data region, and compare them against the vstruct parsers.
+
+    Returns:
+        None
+    """
+    data = b'\x00abc\x00' + b'\x00d\xc3\xa9f\xff\x00' + struct.pack('<IHHH', 3, 0, 1, 0xFFFF) + struct.pack('<III', 2, 0x0, 0x5)
+    region = cim.objects.DataRegion()
+    region.vsParse(struct.pack('<I', 0x80000000 | len(data)) + data)
+
+    for ref in (0x0, 0x5):
+        s = cim.objects.WMIString()
+        s.vsParse(data, offset=ref)
+        assert region.get_string(ref) == s.s
+        # memoized
+        assert region.get_string(ref) is region.get_string(ref)
+    assert region.get_string(0x5) == u'd\xe9f\ufffd'
+
+    boolean = cim.objects.BaseType(cim.objects.CIM_TYPES.CIM_TYPE_BOOLEAN, None)
+    assert region.get_array(0xC, boolean) == [False, True, True]
+
+    string = cim.objects.BaseType(cim.objects.CIM_TYPES.CIM_TYPE_STRING, None)
+    assert region.get_array(0x16, string) == ['abc', u'd\xe9f\ufffd']
+
+
+def test_value_types():
+    """
+    demonstrate the type table agrees with the vstruct value parsers,
+     and that type descriptors are shared.
+
+    Returns:
+        None
+    """
+    for t, info in cim.objects.CIM_TYPE_INFO.items():
+        assert struct.calcsize('<' + info.format) == info.size
+        assert len(info.value_parser()) == info.size
+
+        vt = cim.objects.get_value_type(t)
+        assert vt is cim.objects.get_value_type(t, False)
+        assert vt.value_parser is info.value_parser
+        assert cim.objects.get_value_type(t, True).base_type_clone is vt
+        assert cim.objects.get_value_type(t, True).value_parser is cim.objects.v_uint32
+
+        ct = cim.objects.CimType()
+        ct.vsParse(struct.pack('<BBBB', t, 0x20, 0, 0))
+        assert ct.value_type is cim.objects.get_value_type(t, True)
+        assert str(ct) == str(ct.value_type)
+        assert "%s" % ct.value_type == str(ct)
+        assert cim.objects.get_value_type(t) == cim.objects.ValueType(t, False)
+
+
+def test_class_definition_metadata(classes):
+    """
+    demonstrate the class definition metadata is computed once, and agrees with the property qualifiers.
+
+    Args:
+        classes (List[cim.objects.TreeClassDefinition]): the list of classes found in the win7/deleted-instance repo.
+
+    Returns:
+        None
+    """
+    for klass in classes:
+        definition = klass.cd
+
+        keys = definition.keys
+        assert keys is definition.keys
+        assert keys == [propname for propname, prop in definition.properties.items()
+                        if prop.qualifiers.get('PROP_QUALIFIER_KEY') is True]
+
+        for propname, prop in definition.properties.items():
+            assert prop.name == propname
+            assert prop.qualifiers is prop.qualifiers
+            assert prop.type is cim.objects.get_value_type(prop.type.type, prop.type.is_array)
+
+
+def test_shared_class_cache(repo):
+    """
+    demonstrate that object resolvers on the same repository share parsed classes.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    r1 = cim.objects.ObjectResolver(repo)
+    r2 = cim.objects.ObjectResolver(repo)
+
+    cl = r1.get_cl('root\\CIMV2', 'Win32_Service')
+    hits = r2.class_cache_stats.hits
+    assert r2.get_cl('root\\CIMV2', 'Win32_Service') is cl
+    assert r2.class_cache_stats.hits > hits
+
+    # definitions are shared by their location in the object store.
+    assert r1.get_cd('root\\CIMV2', '__NAMESPACE') is r2.get_cd('root\\CIMV2', '__NAMESPACE')
+
+    # the shared layouts don't keep the resolver that created them alive,
+    #  and resolvers with their own index resolve the same ancestors.
+    assert all(c.object_resolver is None for c in cl.derivation)
+    r3 = cim.objects.ObjectResolver(repo, index=cim.Index(repo.cim_type, repo.logical_index_store))
+    assert r3.get_cl('root\\CIMV2', 'Win32_Service') is cl
+
+
+def test_name_hashes(repo):
+    """
+    demonstrate the memoized and batch name hashes match the index key parts.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    resolver = cim.objects.ObjectResolver(repo)
+
+    root = 'NS_E8C4F9926E52E9240C37C4E59745CEB61A67A77C9F6692EA4295A97E0AF583C5'
+    assert resolver.NS('root') == root
+    assert resolver.NS('ROOT') == root
+
+    # the memoized hash is reused.
+    assert resolver.NS('root') is resolver.NS('root')
+
+    names = ['root', 'root\\CIMV2', '__NAMESPACE', 'not a memoized name']
+    assert resolver.hash_names(names, prefix='NS_') == [resolver.NS(name) for name in names[:-1]] + \
+        [cim.objects.hash_name(repo.cim_type, names[-1], prefix='NS_')]
+    assert resolver.hash_names(names) == [resolver.hash(name.upper().encode('UTF-16LE')) for name in names]
+
+    # raw bytes are memoized apart from the names.
+    data = b'not a memoized name'
+    assert resolver.hash(data) is resolver.hash(data)
+    assert (repo.cim_type, None, data) in cim.objects._name_hashes
+
+    # the batch hashes are not memoized.
+    assert (repo.cim_type, '', 'not a batch name') not in cim.objects._name_hashes
+    resolver.hash_names(['not a batch name'])
+    assert (repo.cim_type, '', 'not a batch name') not in cim.objects._name_hashes
+
+
+def test_instance_names():
+    """
+    demonstrate the instance names hashed into `IL_` key parts, and their XP and Win7 hashes.
+    only instances of classes with key properties can be named.
+
+    Returns:
+        None
+    """
+    class FakeClassDefinition(object):
+        def __init__(self, keys):
+            self.keys = keys
+
+    filter_key = cim.objects.InstanceKey()
+    filter_key.Name = 'SCM Event Log Filter'
+    name = cim.objects.get_instance_name(FakeClassDefinition(['Name']), filter_key)
+    assert name == 'SCM Event Log Filter'
+    assert cim.objects.hash_name(cim.CIM_TYPE_XP, name, prefix='IL_') == \
+        'IL_6805C306D7D1614586171EAE06EEFCFD'
+    assert cim.objects.hash_name(cim.CIM_TYPE_WIN7, name, prefix='IL_') == \
+        'IL_2797AA0512B80E7E1C1A6BA2AC1D2A5EAB929047EBF4944B5812DE3C32DEE06C'
+
+    # these are the well known key parts of the root namespace and its __NAMESPACE instances.
+    assert cim.objects.hash_name(cim.CIM_TYPE_XP, 'root', prefix='NS_') == \
+        'NS_C82638BEBD36E6F8E4573C4F475C62BF'
+    assert cim.objects.hash_name(cim.CIM_TYPE_XP, '__NAMESPACE', prefix='CI_') == \
+        'CI_E5844D1645B0B6E6F2AF610EB14BFC34'
+    assert cim.objects.hash_name(cim.CIM_TYPE_WIN7, '__NAMESPACE', prefix='CI_') == \
+        'CI_64659AB9F8F1C4B568DB6438BAE11B26EE8F93CB5F8195E21E8C383D6C44CC41'
+
+    # numbers are named by their decimal representation.
+    number_key = cim.objects.InstanceKey()
+    number_key.ProcessId = 4
+    assert cim.objects.get_instance_name(FakeClassDefinition(['ProcessId']), number_key) == '4'
+
+    # compound keys are named by the values ordered by property name, separated by U+FFFF.
+    binding_key = cim.objects.InstanceKey()
+    binding_key.Filter = '__EventFilter.Name="BVTFilter"'
+    binding_key.Consumer = 'CommandLineEventConsumer.Name="BVTConsumer"'
+    for keys in (['Consumer', 'Filter'], ['Filter', 'Consumer']):
+        assert cim.objects.get_instance_name(FakeClassDefinition(keys), binding_key) == \
+            u'CommandLineEventConsumer.Name="BVTConsumer"\uffff__EventFilter.Name="BVTFilter"'
+
+    # the naming of singletons isn't known.
+    assert cim.objects.get_instance_name(FakeClassDefinition([]), cim.objects.InstanceKey()) is None
+
+
+def test_instance_lookup(repo):
+    """
+    demonstrate that instances with a single key are found by their key hash, without scanning the class.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    specifiers = list(cim.objects.ObjectResolver(repo).get_cd_children_ci('root', '__NAMESPACE'))
+    assert len(specifiers) > 0
+
+    # a fresh resolver hasn't cached the instance hashes from enumerating the class
+    resolver = cim.objects.ObjectResolver(repo)
+    for specifier in specifiers:
+        instance = resolver.get_ci(specifier.namespace_name, specifier.class_name, specifier.instance_key)
+        assert str(instance.key) == str(specifier.instance_key)
+
+    assert resolver.instance_lookup_stats.hits == len(specifiers)
+    assert resolver.instance_lookup_stats.misses == 0
+
+
+def test_compound_instance_lookup(repo):
+    """
+    demonstrate that instances with a compound key, like `__FilterToConsumerBinding`,
+      are found by their key hash, without scanning the class.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+
+    Returns:
+        None
+    """
+    specifiers = list(cim.objects.ObjectResolver(repo).get_cd_children_ci('root\\subscription',
+                                                                           '__FilterToConsumerBinding'))
+    assert len(specifiers) > 0
+
+    resolver = cim.objects.ObjectResolver(repo)
+    for specifier in specifiers:
+        instance = resolver.get_ci(specifier.namespace_name, specifier.class_name, specifier.instance_key)
+        assert str(instance.key) == str(specifier.instance_key)
+        assert sorted(instance.class_layout.class_definition.keys) == ['Consumer', 'Filter']
+
+    assert resolver.instance_lookup_stats.hits == len(specifiers)
+    assert resolver.instance_lookup_stats.misses == 0
@@ -0,0 +1,41 @@
+import os
+
+import cim.sidecar
+from fixtures import *
+
+
+def test_key_sidecar(repo, tmpdir):
+    """
+    demonstrate that the key sidecar answers queries like the index,
+    and is reused until the repository changes.
+
+    Args:
+        repo (cim.CIM): the deleted-instance repo
+        tmpdir (py.path.local): a temporary directory
+
+    Returns:
+        None
+    """
+    path = str(tmpdir.join('keys.sqlite'))
+    index = cim.Index(repo.cim_type, repo.logical_index_store)
+    keys = list(map(str, index.lookup_prefix(cim.Key('NS_'))))
+
+    with cim.sidecar.KeySidecar.open(repo, path) as sidecar:
+        assert len(sidecar) == len(keys)
+        assert list(map(str, sidecar.lookup_prefix(cim.Key('NS_')))) == keys
+
+        for key in keys[:100]:
+            assert str(sidecar.get(cim.Key(key))) == key
+        assert sidecar.get(cim.Key('NS_')) is None
+
+    assert cim.sidecar.get_sidecar_signature(path) == cim.sidecar.get_repo_signature(repo)
+
+    # a sidecar for some other state of the repository is rebuilt.
+    os.remove(path)
+    with open(path, 'wb') as f:
+        f.write(b'not a sidecar')
+    with cim.sidecar.KeySidecar.open(repo, path) as sidecar:
+        assert len(sidecar) == len(keys)
+
+    # the sidecar was replaced in place, without leaving temporary files behind.
+    assert os.listdir(str(tmpdir)) == ['keys.sqlite']